@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_ingest_job_leases"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("ingest_job", sa.Column("worker_id", sa.String(length=100), nullable=True))
+    op.add_column(
+        "ingest_job",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("ingest_job", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        "ingest_job", sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index("ingest_job_status_created_idx", "ingest_job", ["status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ingest_job_status_created_idx", table_name="ingest_job")
+    op.drop_column("ingest_job", "lease_expires_at")
+    op.drop_column("ingest_job", "heartbeat_at")
+    op.drop_column("ingest_job", "attempts")
+    op.drop_column("ingest_job", "worker_id")
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_raw_block_segments"
+down_revision = "0003_ingest_job_options"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("raw_block", sa.Column("byte_offset", sa.BigInteger(), nullable=True))
+    op.add_column("raw_block", sa.Column("byte_length", sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("raw_block", "byte_length")
+    op.drop_column("raw_block", "byte_offset")
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005_zstd_dictionaries"
+down_revision = "0004_raw_block_segments"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "zstd_dictionary",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("source_file_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("source_file.id"), nullable=True),
+        sa.Column("dict_id", sa.BigInteger(), nullable=False),
+        sa.Column("uri", sa.String(length=500), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.add_column(
+        "raw_block",
+        sa.Column(
+            "dictionary_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("zstd_dictionary.id"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("raw_block", "dictionary_id")
+    op.drop_table("zstd_dictionary")
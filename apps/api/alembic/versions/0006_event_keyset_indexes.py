@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0006_event_keyset_indexes"
+down_revision = "0005_zstd_dictionaries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Indexes on the partitioned parent are created on every existing
+    # partition and inherited by partitions created later.
+    op.execute("CREATE INDEX event_created_id_idx ON event (created_at, id);")
+    op.execute("CREATE INDEX event_job_created_id_idx ON event (ingest_job_id, created_at, id);")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS event_job_created_id_idx;")
+    op.execute("DROP INDEX IF EXISTS event_created_id_idx;")
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from alembic import op
+
+revision = "0007_event_dictionary_indexes"
+down_revision = "0006_event_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+# Filtered event pages are ordered and paginated on (created_at, id), like
+# the unfiltered keyset in 0006, so each filter column is followed by the
+# same columns: a filtered page is an ordered index range scan instead of
+# reading every matching row and sorting them.
+INDEXES = {
+    "event_src_player_created_id_idx": "src_player_id, created_at, id",
+    "event_dst_player_created_id_idx": "dst_player_id, created_at, id",
+    "event_container_created_id_idx": "container_id, created_at, id",
+    "event_item_created_id_idx": "item_id, created_at, id",
+}
+
+
+def upgrade() -> None:
+    # Created on the partitioned parent, so every partition (existing and
+    # future) gets a matching index.
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON event ({columns});")
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name};")
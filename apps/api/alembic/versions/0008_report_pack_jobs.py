@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0008_report_pack_jobs"
+down_revision = "0007_event_dictionary_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column("report_pack", "uri", existing_type=sa.String(length=500), nullable=True)
+    # Packs built before this migration were generated synchronously.
+    op.add_column(
+        "report_pack",
+        sa.Column("status", sa.String(length=40), nullable=False, server_default="completed"),
+    )
+    op.alter_column("report_pack", "status", server_default="queued")
+    op.add_column(
+        "report_pack",
+        sa.Column("progress_json", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.add_column("report_pack", sa.Column("error_text", sa.Text(), nullable=True))
+    op.add_column("report_pack", sa.Column("size", sa.BigInteger(), nullable=True))
+    op.add_column("report_pack", sa.Column("worker_id", sa.String(length=100), nullable=True))
+    op.add_column(
+        "report_pack",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("report_pack", sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        "report_pack", sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        "report_pack",
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_index("report_pack_status_created_idx", "report_pack", ["status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("report_pack_status_created_idx", table_name="report_pack")
+    op.drop_column("report_pack", "updated_at")
+    op.drop_column("report_pack", "lease_expires_at")
+    op.drop_column("report_pack", "heartbeat_at")
+    op.drop_column("report_pack", "attempts")
+    op.drop_column("report_pack", "worker_id")
+    op.drop_column("report_pack", "size")
+    op.drop_column("report_pack", "error_text")
+    op.drop_column("report_pack", "progress_json")
+    op.drop_column("report_pack", "status")
+    op.alter_column("report_pack", "uri", existing_type=sa.String(length=500), nullable=False)
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_source_file_hash_scheme"
+down_revision = "0009_unknown_signature_examples"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("source_file", sa.Column("hash_scheme", sa.String(length=40), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("source_file", "hash_scheme")
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0011_block_fingerprints"
+down_revision = "0010_source_file_hash_scheme"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "block_fingerprint",
+        sa.Column("fingerprint", sa.String(length=32), nullable=False),
+        sa.Column("source_file_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("source_file.id"), nullable=False),
+        sa.Column("ingest_job_id", sa.BigInteger(), sa.ForeignKey("ingest_job.id"), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("fingerprint", "source_file_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("block_fingerprint")
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.sql import Select
+
+from .models import DictContainer, DictEventType, DictItem, DictPlayer, Event
+
+# GET /events (API) and report packs (worker) must select the same rows for
+# the same filter, so this module is kept byte-identical in apps/api/app and
+# apps/worker/worker; scripts/check_shared_modules.py fails if they drift.
+
+# (column, value) -> dictionary row id, or None when the value is unknown.
+Resolver = Callable[[object, str], int | None]
+
+
+@dataclass
+class EventFilters:
+    ingest_job_id: int | None = None
+    event_type: str | None = None
+    player_id: str | None = None
+    container_id: str | None = None
+    item_id: str | None = None
+    start: datetime | None = None
+    end: datetime | None = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> EventFilters:
+        # Report pack filter_json, as posted to POST /report-packs.
+        return cls(
+            ingest_job_id=int(data["ingest_job_id"]) if data.get("ingest_job_id") else None,
+            event_type=data.get("event_type") or None,
+            player_id=data.get("player_id") or None,
+            container_id=data.get("container_id") or None,
+            item_id=data.get("item_id") or None,
+            start=datetime.fromisoformat(data["start"]) if data.get("start") else None,
+            end=datetime.fromisoformat(data["end"]) if data.get("end") else None,
+        )
+
+
+def filter_conditions(filters: EventFilters, resolve: Resolver) -> tuple[list, int | None] | None:
+    # String filters are turned into dictionary ids up front so the planner
+    # sees plain integer predicates on event. Returns the conditions and the
+    # player's dictionary id (applied by player_branches), or None when a
+    # filter value does not exist, i.e. nothing matches.
+    conditions = []
+    if filters.ingest_job_id:
+        conditions.append(Event.ingest_job_id == filters.ingest_job_id)
+    lookups = (
+        (filters.event_type, DictEventType.key, Event.event_type_id),
+        (filters.container_id, DictContainer.key, Event.container_id),
+        (filters.item_id, DictItem.name, Event.item_id),
+    )
+    for value, key_column, event_column in lookups:
+        if value:
+            row_id = resolve(key_column, value)
+            if row_id is None:
+                return None
+            conditions.append(event_column == row_id)
+    if filters.start:
+        conditions.append(Event.occurred_at >= filters.start)
+    if filters.end:
+        conditions.append(Event.occurred_at <= filters.end)
+    player_id = None
+    if filters.player_id:
+        player_id = resolve(DictPlayer.player_id, filters.player_id)
+        if player_id is None:
+            return None
+    return conditions, player_id
+
+
+def player_branches(conditions: list, player_id: int) -> list[Select]:
+    # src OR dst as two index scans, combined with UNION ALL by the caller;
+    # the dst branch skips rows the src branch already returned (a player
+    # moving items to themselves).
+    return [
+        select(Event).where(*conditions, Event.src_player_id == player_id),
+        select(Event).where(
+            *conditions,
+            Event.dst_player_id == player_id,
+            Event.src_player_id.is_distinct_from(player_id),
+        ),
+    ]
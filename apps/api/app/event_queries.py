@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import select, tuple_, union_all
+from sqlalchemy.orm import Query, Session, aliased
+
+from .event_filters import EventFilters, filter_conditions, player_branches
+from .models import DictContainer, DictEventType, DictItem, DictPlayer, Event
+
+DICT_ID_CACHE_SIZE = int(os.getenv("DICT_ID_CACHE_SIZE", "100000"))
+
+
+class DictionaryIdCache:
+    # Dictionary rows are never renamed or deleted, so a key -> id mapping
+    # stays valid forever. Only hits are cached: a key the worker has not
+    # seen yet may be created by the next ingest.
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.entries: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def resolve(self, db: Session, column, value: str) -> int | None:
+        key = (column.class_.__tablename__, value)
+        with self.lock:
+            row_id = self.entries.get(key)
+            if row_id is not None:
+                self.entries.move_to_end(key)
+                return row_id
+        row_id = db.execute(select(column.class_.id).where(column == value)).scalar()
+        if row_id is not None:
+            with self.lock:
+                self.entries[key] = row_id
+                while len(self.entries) > self.capacity:
+                    self.entries.popitem(last=False)
+        return row_id
+
+
+dictionary_ids = DictionaryIdCache(DICT_ID_CACHE_SIZE)
+
+
+def event_rows(
+    db: Session,
+    filters: EventFilters,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    limit: int | None = None,
+) -> Query | None:
+    # Returns None when a filter value does not exist, i.e. nothing matches.
+    # The filters are shared with report packs (event_filters); with ids
+    # resolved up front the planner can walk the per-partition
+    # (<fk>, created_at, id) indexes in page order instead of filtering
+    # after the joins and sorting.
+    matched = filter_conditions(
+        filters, lambda column, value: dictionary_ids.resolve(db, column, value)
+    )
+    if matched is None:
+        return None
+    conditions, player_id = matched
+    if after:
+        conditions.append(tuple_(Event.created_at, Event.id) < tuple_(*after))
+
+    event = Event
+    if player_id is not None:
+        branches = player_branches(conditions, player_id)
+        if limit is not None:
+            branches = [
+                branch.order_by(Event.created_at.desc(), Event.id.desc()).limit(limit)
+                for branch in branches
+            ]
+        event = aliased(Event, union_all(*branches).subquery("player_events"))
+        conditions = []
+
+    src_player = aliased(DictPlayer)
+    dst_player = aliased(DictPlayer)
+    query = (
+        db.query(event, DictEventType, src_player, dst_player, DictItem, DictContainer)
+        .join(DictEventType, event.event_type_id == DictEventType.id)
+        .outerjoin(src_player, event.src_player_id == src_player.id)
+        .outerjoin(dst_player, event.dst_player_id == dst_player.id)
+        .outerjoin(DictItem, event.item_id == DictItem.id)
+        .outerjoin(DictContainer, event.container_id == DictContainer.id)
+        .filter(*conditions)
+        .order_by(event.created_at.desc(), event.id.desc())
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Sequence
+
+import zstandard as zstd
+from sqlalchemy.orm import Session
+
+from .models import RawBlock, ZstdDictionary
+from .storage import object_store
+
+RAW_BLOCK_CACHE_BYTES = int(os.getenv("RAW_BLOCK_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+_DICTIONARIES: dict[uuid.UUID, zstd.ZstdCompressionDict] = {}
+_DICTIONARY_LOCK = threading.Lock()
+_DECOMPRESSORS = threading.local()
+
+
+def _dictionary(db: Session, dictionary_id: uuid.UUID) -> zstd.ZstdCompressionDict:
+    # Dictionaries are immutable once written, so they are cached for the
+    # life of the process.
+    with _DICTIONARY_LOCK:
+        data = _DICTIONARIES.get(dictionary_id)
+    if data is None:
+        row = db.get(ZstdDictionary, dictionary_id)
+        if not row:
+            raise LookupError(f"zstd dictionary {dictionary_id} not found")
+        data = zstd.ZstdCompressionDict(Path(row.uri).read_bytes())
+        with _DICTIONARY_LOCK:
+            data = _DICTIONARIES.setdefault(dictionary_id, data)
+    return data
+
+
+def _decompressor(db: Session, dictionary_id: uuid.UUID | None) -> zstd.ZstdDecompressor:
+    # ZstdDecompressor is not thread-safe; keep one per thread and dictionary
+    # so the dictionary is only loaded into a context once.
+    decompressors = getattr(_DECOMPRESSORS, "by_id", None)
+    if decompressors is None:
+        decompressors = _DECOMPRESSORS.by_id = {}
+    if dictionary_id not in decompressors:
+        if dictionary_id is None:
+            decompressors[dictionary_id] = zstd.ZstdDecompressor()
+        else:
+            decompressors[dictionary_id] = zstd.ZstdDecompressor(
+                dict_data=_dictionary(db, dictionary_id)
+            )
+    return decompressors[dictionary_id]
+
+
+def read_raw_block_lines(db: Session, raw_block: RawBlock) -> list[str]:
+    with object_store.open_raw_block(
+        raw_block.uri, raw_block.byte_offset, raw_block.byte_length
+    ) as handle:
+        data = _decompressor(db, raw_block.dictionary_id).stream_reader(handle).read()
+    return data.decode("utf-8", errors="replace").splitlines()
+
+
+class RawBlockCache:
+    # Decoded blocks keyed by raw_block_id, bounded by their in-memory size
+    # rather than by entry count since block sizes vary per job.
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[uuid.UUID, tuple[tuple[str, ...], int]] = OrderedDict()
+        self.loading: dict[uuid.UUID, Future] = {}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(
+        self, key: uuid.UUID, loader: Callable[[], Sequence[str] | None]
+    ) -> tuple[str, ...] | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self.loading.get(key)
+            if future is None:
+                # First request for a cold block loads it; concurrent ones
+                # wait on the same future instead of decompressing again.
+                self.misses += 1
+                future = self.loading[key] = Future()
+                owner = True
+            else:
+                self.coalesced += 1
+                owner = False
+        if not owner:
+            return future.result()
+        try:
+            loaded = loader()
+            lines = tuple(loaded) if loaded is not None else None
+        except BaseException as exc:
+            with self.lock:
+                del self.loading[key]
+            future.set_exception(exc)
+            raise
+        with self.lock:
+            del self.loading[key]
+            if lines is not None:
+                self._put(key, lines)
+        future.set_result(lines)
+        return lines
+
+    def _put(self, key: uuid.UUID, lines: tuple[str, ...]) -> None:
+        size = sys.getsizeof(lines) + sum(sys.getsizeof(line) for line in lines)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (lines, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+            }
+
+
+block_cache = RawBlockCache(RAW_BLOCK_CACHE_BYTES)
+
+
+def get_raw_block_lines(db: Session, raw_block_id: uuid.UUID) -> tuple[str, ...] | None:
+    # Returns None when the block does not exist; misses are not cached.
+    def load() -> list[str] | None:
+        raw_block = db.get(RawBlock, raw_block_id)
+        if not raw_block:
+            return None
+        return read_raw_block_lines(db, raw_block)
+
+    return block_cache.get(raw_block_id, load)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import base64
+import json
 import uuid
 from datetime import datetime
 
@@ -7,13 +9,28 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, aliased
 
 from ..deps import get_db
+from ..event_queries import EventFilters, event_rows
 from ..models import Event, DictEventType, DictPlayer, DictItem, DictContainer
-from ..schemas import EventOut
+from ..schemas import EventOut, EventPage
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 
-@router.get("", response_model=list[EventOut])
+def encode_cursor(created_at: datetime, event_id: uuid.UUID) -> str:
+    payload = json.dumps([created_at.isoformat(), str(event_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, event_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), uuid.UUID(event_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+@router.get("", response_model=EventPage)
 def list_events(
     db: Session = Depends(get_db),
     ingest_job_id: int | None = None,
@@ -23,34 +40,30 @@ def list_events(
     item_id: str | None = None,
     start: datetime | None = None,
     end: datetime | None = None,
-    limit: int = Query(default=100, le=500),
-    offset: int = 0,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = None,
 ):
-    src_player = aliased(DictPlayer)
-    dst_player = aliased(DictPlayer)
-    query = (
-        db.query(Event, DictEventType, src_player, dst_player, DictItem, DictContainer)
-        .join(DictEventType, Event.event_type_id == DictEventType.id)
-        .outerjoin(src_player, Event.src_player_id == src_player.id)
-        .outerjoin(dst_player, Event.dst_player_id == dst_player.id)
-        .outerjoin(DictItem, Event.item_id == DictItem.id)
-        .outerjoin(DictContainer, Event.container_id == DictContainer.id)
+    filters = EventFilters(
+        ingest_job_id=ingest_job_id,
+        event_type=event_type,
+        player_id=player_id,
+        container_id=container_id,
+        item_id=item_id,
+        start=start,
+        end=end,
     )
-    if ingest_job_id:
-        query = query.filter(Event.ingest_job_id == ingest_job_id)
-    if event_type:
-        query = query.filter(DictEventType.key == event_type)
-    if player_id:
-        query = query.filter((src_player.player_id == player_id) | (dst_player.player_id == player_id))
-    if container_id:
-        query = query.filter(DictContainer.key == container_id)
-    if item_id:
-        query = query.filter(DictItem.name == item_id)
-    if start:
-        query = query.filter(Event.occurred_at >= start)
-    if end:
-        query = query.filter(Event.occurred_at <= end)
-    rows = query.order_by(Event.created_at.desc()).offset(offset).limit(limit).all()
+    # Keyset pagination on (created_at, id): every page is an index range
+    # scan from the cursor, so deep pages cost the same as the first one.
+    after = decode_cursor(cursor) if cursor else None
+    query = event_rows(db, filters, after=after, limit=limit + 1)
+    if query is None:
+        return EventPage(items=[])
+    rows = query.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_event = rows[-1][0]
+        next_cursor = encode_cursor(last_event.created_at, last_event.id)
     events = []
     for event, event_type_row, src_player, dst_player, item, container in rows:
         events.append(
@@ -72,7 +85,7 @@ def list_events(
                 global_line_no=event.global_line_no,
             )
         )
-    return events
+    return EventPage(items=events, next_cursor=next_cursor)
 
 
 @router.get("/{event_id}", response_model=EventOut)
@@ -1,19 +1,40 @@
 from __future__ import annotations
 
+import json
 import uuid
+from collections.abc import Iterator, Sequence
 
-import zstandard as zstd
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from ..db import SessionLocal
 from ..deps import get_db
-from ..models import RawBlock
-from ..schemas import EvidenceOut
-from ..storage import object_store
+from ..models import Event
+from ..raw_blocks import block_cache, get_raw_block_lines
+from ..schemas import EvidenceBatchItem, EvidenceBatchRequest, EvidenceOut
 
 router = APIRouter(prefix="/evidence", tags=["evidence"])
 
 
+def _evidence(
+    lines: Sequence[str], raw_block_id: uuid.UUID, line_index: int, context: int
+) -> EvidenceOut | None:
+    if line_index < 0 or line_index >= len(lines):
+        return None
+    start = max(0, line_index - context)
+    end = min(len(lines), line_index + context + 1)
+    return EvidenceOut(
+        raw_block_id=raw_block_id,
+        line_index=line_index,
+        line=lines[line_index],
+        context_before=list(lines[start:line_index]),
+        context_after=list(lines[line_index + 1 : end]),
+        global_line_no=None,
+    )
+
+
 @router.get("/raw-line", response_model=EvidenceOut)
 def get_raw_line(
     raw_block_id: uuid.UUID,
@@ -21,24 +42,92 @@ def get_raw_line(
     context: int = Query(default=2, le=10),
     db: Session = Depends(get_db),
 ):
-    raw_block = db.get(RawBlock, raw_block_id)
-    if not raw_block:
+    lines = get_raw_block_lines(db, raw_block_id)
+    if lines is None:
         raise HTTPException(status_code=404, detail="Raw block not found")
-    with object_store.open_raw_block(raw_block.uri) as handle:
-        decompressor = zstd.ZstdDecompressor()
-        data = decompressor.stream_reader(handle).read()
-    lines = data.decode("utf-8", errors="replace").splitlines()
-    if line_index < 0 or line_index >= len(lines):
+    evidence = _evidence(lines, raw_block_id, line_index, context)
+    if evidence is None:
         raise HTTPException(status_code=404, detail="Line index out of range")
-    start = max(0, line_index - context)
-    end = min(len(lines), line_index + context + 1)
-    context_before = lines[start:line_index]
-    context_after = lines[line_index + 1 : end]
-    return EvidenceOut(
-        raw_block_id=raw_block_id,
-        line_index=line_index,
-        line=lines[line_index],
-        context_before=context_before,
-        context_after=context_after,
-        global_line_no=None,
+    return evidence
+
+
+@router.post("/batch")
+def get_evidence_batch(payload: EvidenceBatchRequest, db: Session = Depends(get_db)):
+    # Responds with one NDJSON line per input item, in input order. Event ids
+    # are resolved with a single query and every raw block is read once.
+    event_ids = [item.event_id for item in payload.items if item.event_id is not None]
+    events = {}
+    if event_ids:
+        rows = db.execute(
+            select(Event.id, Event.raw_block_id, Event.raw_line_index, Event.global_line_no).where(
+                Event.id.in_(event_ids)
+            )
+        )
+        events = {row.id: row for row in rows}
+    return StreamingResponse(
+        _stream_batch(payload.items, events), media_type="application/x-ndjson"
     )
+
+
+def _stream_batch(items: list[EvidenceBatchItem], events: dict) -> Iterator[str]:
+    results: list[dict | None] = [None] * len(items)
+    by_block: dict[uuid.UUID, list[int]] = {}
+    for index, item in enumerate(items):
+        if item.event_id is not None:
+            event = events.get(item.event_id)
+            if event is None:
+                results[index] = {"index": index, "event_id": str(item.event_id), "error": "Event not found"}
+                continue
+            raw_block_id = event.raw_block_id
+        else:
+            raw_block_id = item.raw_block_id
+        by_block.setdefault(raw_block_id, []).append(index)
+
+    emitted = 0
+    # The request session is already closed once the body streams.
+    with SessionLocal() as db:
+        for raw_block_id, indexes in by_block.items():
+            lines = get_raw_block_lines(db, raw_block_id)
+            for index in indexes:
+                results[index] = _batch_result(index, items[index], events, raw_block_id, lines)
+            # Blocks are visited in order of first appearance, so whatever
+            # prefix of the input is complete can be flushed right away.
+            while emitted < len(results) and results[emitted] is not None:
+                yield json.dumps(results[emitted]) + "\n"
+                results[emitted] = None
+                emitted += 1
+    while emitted < len(results):
+        yield json.dumps(results[emitted]) + "\n"
+        emitted += 1
+
+
+def _batch_result(
+    index: int,
+    item: EvidenceBatchItem,
+    events: dict,
+    raw_block_id: uuid.UUID,
+    lines: Sequence[str] | None,
+) -> dict:
+    result: dict = {"index": index}
+    if item.event_id is not None:
+        result["event_id"] = str(item.event_id)
+        event = events[item.event_id]
+        line_index, global_line_no = event.raw_line_index, event.global_line_no
+    else:
+        line_index, global_line_no = item.line_index, None
+    if lines is None:
+        result["error"] = "Raw block not found"
+        return result
+    evidence = _evidence(lines, raw_block_id, line_index, item.context)
+    if evidence is None:
+        result["error"] = "Line index out of range"
+        return result
+    evidence.global_line_no = global_line_no
+    evidence.event_id = item.event_id
+    result.update(evidence.model_dump(mode="json"))
+    return result
+
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    return block_cache.stats()
@@ -1,54 +1,91 @@
 from __future__ import annotations
 
+import os
+import uuid
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from ..deps import get_db
 from ..models import IngestJob, SourceFile, Event, DictEventType
-from ..schemas import IngestJobCreate, IngestJobOut
+from ..schemas import IngestJobCreate, IngestJobOut, IngestProgressOut
 
 router = APIRouter(prefix="/ingest-jobs", tags=["ingest-jobs"])
 
+# Must match the worker's JOB_NOTIFY_CHANNEL (worker/config.py).
+JOB_NOTIFY_CHANNEL = os.getenv("JOB_NOTIFY_CHANNEL", "phx_jobs")
 
-@router.post("", response_model=IngestJobOut)
-def create_ingest_job(payload: IngestJobCreate, db: Session = Depends(get_db)):
-    source_file = db.get(SourceFile, payload.source_file_id)
-    if not source_file:
-        raise HTTPException(status_code=404, detail="Source file not found")
-    job = IngestJob(source_file_id=payload.source_file_id, status="queued")
-    db.add(job)
-    db.commit()
-    db.refresh(job)
+
+def _progress(progress_json: dict | None) -> IngestProgressOut | None:
+    # Sums the per-range checkpoints the worker writes with every batch.
+    progress_json = progress_json or {}
+    checkpoints = (progress_json.get("checkpoints") or {}).values()
+    bytes_total = progress_json.get("bytes_total")
+    if not bytes_total:
+        return None
+    bytes_done = sum(checkpoint.get("bytes_done", 0) for checkpoint in checkpoints)
+    running = [checkpoint for checkpoint in checkpoints if not checkpoint.get("done")]
+    bytes_per_sec = sum(checkpoint.get("bytes_per_sec", 0) for checkpoint in running)
+    remaining = max(bytes_total - bytes_done, 0)
+    return IngestProgressOut(
+        bytes_done=bytes_done,
+        bytes_total=bytes_total,
+        percent=round(min(bytes_done / bytes_total, 1.0) * 100, 1),
+        lines_done=sum(checkpoint.get("lines_done", 0) for checkpoint in checkpoints),
+        bytes_per_sec=bytes_per_sec,
+        lines_per_sec=sum(checkpoint.get("lines_per_sec", 0) for checkpoint in running),
+        eta_seconds=round(remaining / bytes_per_sec) if remaining and bytes_per_sec else None,
+    )
+
+
+def _job_out(job: IngestJob) -> IngestJobOut:
     return IngestJobOut(
         id=job.id,
         source_file_id=job.source_file_id,
         status=job.status,
         progress_json=job.progress_json,
+        progress=_progress(job.progress_json),
         stats_json=job.stats_json,
+        options_json=job.options_json,
         error_text=job.error_text,
+        worker_id=job.worker_id,
+        attempts=job.attempts or 0,
+        heartbeat_at=job.heartbeat_at,
         created_at=job.created_at,
         updated_at=job.updated_at,
     )
 
 
+@router.post("", response_model=IngestJobOut)
+def create_ingest_job(payload: IngestJobCreate, db: Session = Depends(get_db)):
+    source_file = db.get(SourceFile, payload.source_file_id)
+    if not source_file:
+        raise HTTPException(status_code=404, detail="Source file not found")
+    options = payload.model_dump(
+        include={"raw_block_size", "compression_level", "zstd_dictionary", "dedupe"}, exclude_none=True
+    )
+    job = IngestJob(source_file_id=payload.source_file_id, status="queued", options_json=options)
+    db.add(job)
+    db.flush()
+    # Delivered to LISTENing workers when the transaction commits.
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": JOB_NOTIFY_CHANNEL, "payload": str(job.id)},
+    )
+    db.commit()
+    db.refresh(job)
+    return _job_out(job)
+
+
 @router.get("", response_model=list[IngestJobOut])
-def list_ingest_jobs(db: Session = Depends(get_db)):
-    jobs = db.query(IngestJob).order_by(IngestJob.created_at.desc()).all()
-    return [
-        IngestJobOut(
-            id=job.id,
-            source_file_id=job.source_file_id,
-            status=job.status,
-            progress_json=job.progress_json,
-            stats_json=job.stats_json,
-            error_text=job.error_text,
-            created_at=job.created_at,
-            updated_at=job.updated_at,
-        )
-        for job in jobs
-    ]
+def list_ingest_jobs(source_file_id: uuid.UUID | None = None, db: Session = Depends(get_db)):
+    query = db.query(IngestJob)
+    if source_file_id:
+        query = query.filter(IngestJob.source_file_id == source_file_id)
+    jobs = query.order_by(IngestJob.created_at.desc()).all()
+    return [_job_out(job) for job in jobs]
 
 
 @router.get("/{job_id}", response_model=IngestJobOut)
@@ -56,16 +93,7 @@ def get_ingest_job(job_id: int, db: Session = Depends(get_db)):
     job = db.get(IngestJob, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return IngestJobOut(
-        id=job.id,
-        source_file_id=job.source_file_id,
-        status=job.status,
-        progress_json=job.progress_json,
-        stats_json=job.stats_json,
-        error_text=job.error_text,
-        created_at=job.created_at,
-        updated_at=job.updated_at,
-    )
+    return _job_out(job)
 
 
 @router.get("/{job_id}/preview")
@@ -1,133 +1,230 @@
 from __future__ import annotations
 
+import math
 import uuid
 from pathlib import Path
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..deps import get_db
 from ..models import UploadSession, SourceFile
 from ..schemas import UploadCreate, UploadSessionOut, SourceFileOut
-from ..storage import object_store
+from ..storage import HASH_LEAF_SIZE, HASH_SCHEME, UPLOAD_MAX_CHUNK_BYTES, object_store
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
 
+def _session_out(session: UploadSession) -> UploadSessionOut:
+    return UploadSessionOut(
+        id=session.id,
+        filename=session.filename,
+        size=session.size,
+        status=session.status,
+        chunk_size=session.chunk_size,
+        expected_chunks=session.expected_chunks,
+        received_chunks=session.received_chunks or [],
+    )
+
+
+def _source_file_out(source_file: SourceFile) -> SourceFileOut:
+    return SourceFileOut(
+        id=source_file.id,
+        sha256=source_file.sha256,
+        name=source_file.name,
+        size=source_file.size,
+        uri=source_file.uri,
+        created_at=source_file.created_at,
+    )
+
+
 @router.post("/create", response_model=UploadSessionOut)
 def create_upload(payload: UploadCreate, db: Session = Depends(get_db)):
+    if payload.chunk_size <= 0 or payload.chunk_size % HASH_LEAF_SIZE:
+        raise HTTPException(
+            status_code=422, detail=f"chunk_size must be a multiple of {HASH_LEAF_SIZE} bytes"
+        )
+    if payload.chunk_size > UPLOAD_MAX_CHUNK_BYTES:
+        raise HTTPException(
+            status_code=422, detail=f"chunk_size must be at most {UPLOAD_MAX_CHUNK_BYTES} bytes"
+        )
+    expected_chunks = math.ceil(payload.size / payload.chunk_size)
+    if payload.expected_chunks is not None and payload.expected_chunks != expected_chunks:
+        raise HTTPException(status_code=422, detail=f"expected_chunks must be {expected_chunks}")
     upload_id = uuid.uuid4()
-    temp_prefix = object_store.create_upload_prefix(str(upload_id))
+    temp_prefix = object_store.create_upload_prefix(str(upload_id), payload.size)
     session = UploadSession(
         id=upload_id,
         filename=payload.filename,
         size=payload.size,
         status="OPEN",
         chunk_size=payload.chunk_size,
-        expected_chunks=payload.expected_chunks,
+        expected_chunks=expected_chunks,
         received_chunks=[],
         temp_prefix=str(temp_prefix),
     )
     db.add(session)
     db.commit()
     db.refresh(session)
-    return UploadSessionOut(
-        id=session.id,
-        filename=session.filename,
-        size=session.size,
-        status=session.status,
-        chunk_size=session.chunk_size,
-        expected_chunks=session.expected_chunks,
-        received_chunks=session.received_chunks or [],
-    )
+    return _session_out(session)
+
+
+@router.get("/source-files/{sha256}", response_model=SourceFileOut)
+def get_source_file(sha256: str, db: Session = Depends(get_db)):
+    # Lets clients skip uploading a file the server already has.
+    source_file = db.query(SourceFile).filter(SourceFile.sha256 == sha256).one_or_none()
+    if not source_file:
+        raise HTTPException(status_code=404, detail="Source file not found")
+    return _source_file_out(source_file)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionOut)
+def get_upload(upload_id: uuid.UUID, db: Session = Depends(get_db)):
+    session = db.get(UploadSession, upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return _session_out(session)
+
+
+def _mark_received(db: Session, upload_id: uuid.UUID, index: int) -> list[int] | None:
+    # One statement, so parallel chunk PUTs cannot lose each other's index
+    # the way a read-modify-write of the list would: the row lock makes a
+    # concurrent UPDATE re-read the list another request just extended.
+    row = db.execute(
+        text(
+            "UPDATE upload_session SET received_chunks = ("
+            "SELECT jsonb_agg(DISTINCT chunk ORDER BY chunk) FROM jsonb_array_elements("
+            "coalesce(received_chunks, '[]'::jsonb) || to_jsonb(CAST(:index AS integer))) AS chunk"
+            ") WHERE id = :upload_id AND status = 'OPEN' RETURNING received_chunks"
+        ),
+        {"index": index, "upload_id": upload_id},
+    ).one_or_none()
+    db.commit()
+    return row.received_chunks if row else None
+
+
+def _require_open(db: Session, upload_id: uuid.UUID) -> None:
+    status = db.execute(
+        text("SELECT status FROM upload_session WHERE id = :upload_id"), {"upload_id": upload_id}
+    ).scalar()
+    db.rollback()
+    if status != "OPEN":
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+
+
+def _chunk_target(db: Session, upload_id: uuid.UUID, index: int) -> tuple[Path, int, int]:
+    session = db.get(UploadSession, upload_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session.status != "OPEN":
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    if not 0 <= index < session.expected_chunks:
+        raise HTTPException(status_code=422, detail="Chunk index out of range")
+    offset = index * session.chunk_size
+    target = Path(session.temp_prefix), offset, min(session.chunk_size, session.size - offset)
+    # Give the connection back to the pool while the body streams.
+    db.rollback()
+    return target
 
 
 @router.put("/{upload_id}/chunk")
-def upload_chunk(
+async def upload_chunk(
     upload_id: uuid.UUID,
     index: int,
-    data: bytes = Body(...),
+    request: Request,
     db: Session = Depends(get_db),
 ):
-    session = db.get(UploadSession, upload_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Upload session not found")
-    if session.status != "OPEN":
+    # The body is streamed to disk piece by piece instead of being buffered
+    # by Starlette, so memory per request stays at one network read.
+    prefix, offset, expected_length = await run_in_threadpool(_chunk_target, db, upload_id, index)
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > expected_length:
+        raise HTTPException(status_code=413, detail=f"Chunk {index} must be {expected_length} bytes")
+
+    try:
+        writer = await run_in_threadpool(object_store.open_chunk, prefix, index, offset)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=409, detail="Upload already finalized") from exc
+    received = 0
+    try:
+        # Checked again under the chunk lock: finalize may have run between
+        # _chunk_target and the lock, and the data file may have moved.
+        await run_in_threadpool(_require_open, db, upload_id)
+        async for piece in request.stream():
+            received += len(piece)
+            if received > expected_length:
+                raise HTTPException(
+                    status_code=413, detail=f"Chunk {index} must be {expected_length} bytes"
+                )
+            await run_in_threadpool(writer.write, piece)
+        if received != expected_length:
+            raise HTTPException(
+                status_code=422, detail=f"Chunk {index} must be {expected_length} bytes, got {received}"
+            )
+        await run_in_threadpool(writer.commit)
+    finally:
+        writer.close()
+
+    received_chunks = await run_in_threadpool(_mark_received, db, upload_id, index)
+    if received_chunks is None:
         raise HTTPException(status_code=409, detail="Upload already finalized")
-    prefix = Path(session.temp_prefix)
-    object_store.write_chunk(prefix, index, data)
-    received = set(session.received_chunks or [])
-    received.add(index)
-    session.received_chunks = sorted(received)
-    db.commit()
     return {
         "status": "ok",
         "index": index,
-        "received": len(data),
-        "received_chunks": session.received_chunks,
+        "received": received,
+        "received_chunks": received_chunks,
     }
 
 
 @router.post("/{upload_id}/finalize", response_model=SourceFileOut)
 def finalize_upload(upload_id: uuid.UUID, db: Session = Depends(get_db)):
-    session = db.get(UploadSession, upload_id)
+    # The row lock serializes finalize calls and makes a concurrent
+    # _mark_received wait until the session is FINALIZED (and then fail).
+    session = db.query(UploadSession).filter(UploadSession.id == upload_id).with_for_update().one_or_none()
     if not session:
         raise HTTPException(status_code=404, detail="Upload session not found")
+    prefix = Path(session.temp_prefix)
     if session.status == "FINALIZED":
         existing = db.query(SourceFile).filter(SourceFile.sha256 == session.final_sha256).one_or_none()
+        db.commit()
         if existing:
-            return SourceFileOut(
-                id=existing.id,
-                sha256=existing.sha256,
-                name=existing.name,
-                size=existing.size,
-                uri=existing.uri,
-                created_at=existing.created_at,
-            )
+            # Completes a finalize that stopped between commit and rename.
+            object_store.store_upload(prefix, session.final_sha256)
+            return _source_file_out(existing)
         raise HTTPException(status_code=409, detail="Upload already finalized")
+    if session.status != "OPEN":
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"Upload is {session.status}")
     expected = session.expected_chunks
-    if expected is not None and len(session.received_chunks or []) < expected:
+    if len(session.received_chunks or []) < expected:
+        db.rollback()
         raise HTTPException(status_code=409, detail="Missing chunks")
-    prefix = Path(session.temp_prefix)
-    chunk_paths = sorted(prefix.glob("chunk_*.part"))
-    digest, target, size = object_store.finalize_upload(chunk_paths)
-    for path in chunk_paths:
-        path.unlink(missing_ok=True)
     try:
-        prefix.rmdir()
-    except OSError:
-        pass
-    existing = db.query(SourceFile).filter(SourceFile.sha256 == digest).one_or_none()
-    if existing:
-        session.status = "FINALIZED"
-        session.final_sha256 = digest
-        session.final_uri = str(target)
-        db.commit()
-        return SourceFileOut(
-            id=existing.id,
-            sha256=existing.sha256,
-            name=existing.name,
-            size=existing.size,
-            uri=existing.uri,
-            created_at=existing.created_at,
-        )
-    source_file = SourceFile(
-        sha256=digest,
-        name=session.filename,
-        size=size,
-        uri=str(target),
-    )
-    session.status = "FINALIZED"
-    session.final_sha256 = digest
-    session.final_uri = str(target)
-    db.add(source_file)
-    db.commit()
-    db.refresh(source_file)
-    return SourceFileOut(
-        id=source_file.id,
-        sha256=source_file.sha256,
-        name=source_file.name,
-        size=source_file.size,
-        uri=source_file.uri,
-        created_at=source_file.created_at,
-    )
+        # Waits for chunk writes in flight; writers that get the lock
+        # afterwards see the session FINALIZED and never write, so the data
+        # cannot change after its digest is taken.
+        with object_store.upload_lock(prefix):
+            digest = object_store.upload_digest(prefix, expected)
+            target = object_store.source_file_path(digest)
+            source_file = db.query(SourceFile).filter(SourceFile.sha256 == digest).one_or_none()
+            if source_file is None:
+                source_file = SourceFile(
+                    sha256=digest,
+                    name=session.filename,
+                    size=session.size,
+                    uri=str(target),
+                    hash_scheme=HASH_SCHEME,
+                )
+                db.add(source_file)
+            session.status = "FINALIZED"
+            session.final_sha256 = digest
+            session.final_uri = str(target)
+            db.commit()
+            db.refresh(source_file)
+            object_store.store_upload(prefix, digest)
+    except FileNotFoundError as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Missing chunks") from exc
+    return _source_file_out(source_file)
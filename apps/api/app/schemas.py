@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Any, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class UploadCreate(BaseModel):
@@ -35,6 +35,20 @@ class SourceFileOut(BaseModel):
 
 class IngestJobCreate(BaseModel):
     source_file_id: UUID
+    raw_block_size: int | None = Field(default=None, ge=50, le=100_000)
+    compression_level: int | None = Field(default=None, ge=1, le=22)
+    zstd_dictionary: bool | None = None
+    dedupe: bool | None = None
+
+
+class IngestProgressOut(BaseModel):
+    bytes_done: int
+    bytes_total: int
+    percent: float
+    lines_done: int
+    bytes_per_sec: int
+    lines_per_sec: int
+    eta_seconds: int | None = None
 
 
 class IngestJobOut(BaseModel):
@@ -42,8 +56,13 @@ class IngestJobOut(BaseModel):
     source_file_id: UUID
     status: str
     progress_json: dict | None
+    progress: IngestProgressOut | None = None
     stats_json: dict | None
+    options_json: dict | None = None
     error_text: Optional[str]
+    worker_id: Optional[str] = None
+    attempts: int = 0
+    heartbeat_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -66,6 +85,11 @@ class EventOut(BaseModel):
     global_line_no: int
 
 
+class EventPage(BaseModel):
+    items: list[EventOut]
+    next_cursor: str | None = None
+
+
 class EvidenceOut(BaseModel):
     raw_block_id: UUID
     line_index: int
@@ -73,6 +97,24 @@ class EvidenceOut(BaseModel):
     context_before: list[str]
     context_after: list[str]
     global_line_no: int | None = None
+    event_id: UUID | None = None
+
+
+class EvidenceBatchItem(BaseModel):
+    event_id: UUID | None = None
+    raw_block_id: UUID | None = None
+    line_index: int | None = None
+    context: int = Field(default=2, ge=0, le=10)
+
+    @model_validator(mode="after")
+    def check_target(self) -> EvidenceBatchItem:
+        if self.event_id is None and (self.raw_block_id is None or self.line_index is None):
+            raise ValueError("Either event_id or raw_block_id and line_index are required")
+        return self
+
+
+class EvidenceBatchRequest(BaseModel):
+    items: list[EvidenceBatchItem] = Field(max_length=5000)
 
 
 class ReportPackCreate(BaseModel):
@@ -84,5 +126,9 @@ class ReportPackOut(BaseModel):
     id: UUID
     name: str
     filter_json: dict
-    uri: str
+    uri: str | None = None
+    status: str = "completed"
+    progress_json: dict | None = None
+    error_text: Optional[str] = None
+    size: int | None = None
     created_at: datetime
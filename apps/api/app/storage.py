@@ -1,12 +1,82 @@
 from __future__ import annotations
 
+import fcntl
 import hashlib
+import io
 import os
+import shutil
+from contextlib import contextmanager
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Iterator
 
 OBJECT_STORE_PATH = Path(os.getenv("OBJECT_STORE_PATH", "/data/object-store"))
 UPLOAD_PATH = Path(os.getenv("UPLOAD_PATH", "/data/uploads"))
+UPLOAD_DATA_NAME = "data"
+UPLOAD_MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(64 * 1024 * 1024)))
+
+# Source files are identified by the SHA-256 of the SHA-256 digests of
+# their 1 MiB leaves, in order. Leaves are hashed as chunks arrive; chunk
+# sizes must be a multiple of the leaf so the id does not depend on how a
+# file was split for upload.
+HASH_LEAF_SIZE = 1024 * 1024
+HASH_SCHEME = "sha256-leaves-1m"
+
+
+class ChunkWriter:
+    # Streams one chunk into its place in the upload's data file, hashing
+    # leaves as the bytes go by. Chunks start on a leaf boundary. A shared
+    # lock on the data file is held until close(), so finalize (which takes
+    # it exclusively) waits for chunk writes in flight, and a writer that
+    # opened the file before finalize moved it only gets the lock after
+    # the session is finalized; the caller must check the session again.
+    def __init__(self, prefix: Path, index: int, offset: int) -> None:
+        self.prefix = prefix
+        self.index = index
+        self.offset = offset
+        self.fd = os.open(prefix / UPLOAD_DATA_NAME, os.O_WRONLY)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_SH)
+        except OSError:
+            os.close(self.fd)
+            raise
+        self.leaf = hashlib.sha256()
+        self.leaf_bytes = 0
+        self.digests = bytearray()
+
+    def write(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(self.fd, view, self.offset)
+            self.offset += written
+            self._hash(view[:written])
+            view = view[written:]
+
+    def _hash(self, view: memoryview) -> None:
+        while view:
+            take = min(len(view), HASH_LEAF_SIZE - self.leaf_bytes)
+            self.leaf.update(view[:take])
+            self.leaf_bytes += take
+            view = view[take:]
+            if self.leaf_bytes == HASH_LEAF_SIZE:
+                self.digests += self.leaf.digest()
+                self.leaf = hashlib.sha256()
+                self.leaf_bytes = 0
+
+    def commit(self) -> None:
+        # The digest file is written last: its presence means the chunk is
+        # complete, and finalize combines these instead of re-reading data.
+        if self.leaf_bytes:
+            self.digests += self.leaf.digest()
+            self.leaf_bytes = 0
+        digest_path = self.prefix / f"chunk_{self.index:06d}.sha256"
+        partial = digest_path.with_suffix(".tmp")
+        partial.write_bytes(self.digests)
+        partial.replace(digest_path)
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
 
 
 class LocalObjectStore:
@@ -14,45 +84,63 @@ class LocalObjectStore:
         OBJECT_STORE_PATH.mkdir(parents=True, exist_ok=True)
         UPLOAD_PATH.mkdir(parents=True, exist_ok=True)
 
-    def create_upload_prefix(self, upload_id: str) -> Path:
+    def create_upload_prefix(self, upload_id: str, size: int) -> Path:
         target = UPLOAD_PATH / upload_id
         target.mkdir(parents=True, exist_ok=True)
+        # Chunks are written straight into their place in a sparse file of
+        # the final size, so finalizing never copies the data.
+        with (target / UPLOAD_DATA_NAME).open("wb") as handle:
+            handle.truncate(size)
         return target
 
-    def write_chunk(self, prefix: Path, index: int, data: bytes) -> Path:
-        chunk_path = prefix / f"chunk_{index:06d}.part"
-        with chunk_path.open("wb") as handle:
-            handle.write(data)
-        return chunk_path
+    def open_chunk(self, prefix: Path, index: int, offset: int) -> ChunkWriter:
+        return ChunkWriter(prefix, index, offset)
 
-    def finalize_upload(self, chunk_paths: list[Path]) -> tuple[str, Path, int]:
-        sha256 = hashlib.sha256()
-        size = 0
-        target = OBJECT_STORE_PATH / "source-files"
-        target.mkdir(parents=True, exist_ok=True)
-        temp_path = target / f"tmp-{hashlib.sha256(os.urandom(8)).hexdigest()}"
-        with temp_path.open("wb") as output:
-            for path in chunk_paths:
-                with path.open("rb") as handle:
-                    for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-                        sha256.update(chunk)
-                        size += len(chunk)
-                        output.write(chunk)
-        digest = sha256.hexdigest()
-        final_path = target / digest
-        if not final_path.exists():
-            temp_path.replace(final_path)
-        else:
-            temp_path.unlink(missing_ok=True)
-        return digest, final_path, size
-
-    def open_raw_block(self, uri: str) -> BinaryIO:
-        return Path(uri).open("rb")
-
-    def get_report_pack_path(self, name: str) -> Path:
-        target = OBJECT_STORE_PATH / "report-packs" / name
-        target.parent.mkdir(parents=True, exist_ok=True)
-        return target
+    @contextmanager
+    def upload_lock(self, prefix: Path) -> Iterator[None]:
+        # Exclusive counterpart of ChunkWriter's shared lock. Raises
+        # FileNotFoundError when the data file is already gone.
+        fd = os.open(prefix / UPLOAD_DATA_NAME, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def upload_digest(self, prefix: Path, expected_chunks: int) -> str:
+        # Only the per-chunk leaf digests are read; the data is not.
+        leaves = bytearray()
+        for index in range(expected_chunks):
+            digest_path = prefix / f"chunk_{index:06d}.sha256"
+            if not digest_path.exists():
+                raise FileNotFoundError(digest_path)
+            leaves += digest_path.read_bytes()
+        return hashlib.sha256(leaves).hexdigest()
+
+    def source_file_path(self, digest: str) -> Path:
+        return OBJECT_STORE_PATH / "source-files" / digest
+
+    def store_upload(self, prefix: Path, digest: str) -> Path:
+        # Renames the data file into the object store. Safe to repeat: a
+        # file already stored under the digest is kept and the upload's
+        # leftovers are removed.
+        final_path = self.source_file_path(digest)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        data_path = prefix / UPLOAD_DATA_NAME
+        if not final_path.exists() and data_path.exists():
+            shutil.move(data_path, final_path)
+        shutil.rmtree(prefix, ignore_errors=True)
+        return final_path
+
+    def open_raw_block(
+        self, uri: str, offset: int | None = None, length: int | None = None
+    ) -> BinaryIO:
+        # Raw blocks written as frames inside a segment file are fetched with
+        # a single pread; legacy one-file-per-block rows have no range.
+        if offset is None or length is None:
+            return Path(uri).open("rb")
+        with Path(uri).open("rb") as handle:
+            return io.BytesIO(os.pread(handle.fileno(), length, offset))
 
 
 object_store = LocalObjectStore()
@@ -30,6 +30,7 @@ type Evidence = {
 export default function EventsPage() {
   const searchParams = useSearchParams();
   const [rows, setRows] = useState<EventRow[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [filters, setFilters] = useState({
     ingest_job_id: searchParams.get("ingest_job_id") ?? "",
     event_type: "",
@@ -52,13 +53,18 @@ export default function EventsPage() {
     return params.toString();
   }, [filters]);
 
-  const loadEvents = async () => {
-    const response = await fetch(`${API_BASE}/events?${query}`);
+  const loadEvents = async (cursor: string | null = null) => {
+    const params = new URLSearchParams(query);
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
+    const response = await fetch(`${API_BASE}/events?${params.toString()}`);
     if (!response.ok) {
       return;
     }
     const data = await response.json();
-    setRows(data);
+    setRows((prev) => (cursor ? [...prev, ...data.items] : data.items));
+    setNextCursor(data.next_cursor);
   };
 
   useEffect(() => {
@@ -152,6 +158,11 @@ export default function EventsPage() {
           ))}
         </tbody>
       </table>
+      {nextCursor && (
+        <button type="button" onClick={() => loadEvents(nextCursor)}>
+          Load more
+        </button>
+      )}
 
       {selected && (
         <div className="section card">
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import zstandard as zstd
+
+from .config import RAW_BLOCK_THREADS, RAW_DICT_MIN_GAIN, RAW_DICT_SAMPLES, RAW_DICT_SIZE
+
+MIN_DICT_SAMPLES = 16
+# Every Nth sample is held out of training to measure the dictionary on.
+DICT_HOLDOUT_EVERY = 8
+
+_COMPRESSION_POOL: ThreadPoolExecutor | None = None
+_COMPRESSORS = threading.local()
+_DECOMPRESSORS = threading.local()
+
+
+@dataclass(frozen=True)
+class RawDictionary:
+    id: uuid.UUID
+    data: zstd.ZstdCompressionDict
+
+
+def compression_pool() -> ThreadPoolExecutor:
+    global _COMPRESSION_POOL
+    if _COMPRESSION_POOL is None:
+        _COMPRESSION_POOL = ThreadPoolExecutor(
+            max_workers=RAW_BLOCK_THREADS, thread_name_prefix="raw-block"
+        )
+    return _COMPRESSION_POOL
+
+
+def compressor(level: int, dictionary: RawDictionary | None = None) -> zstd.ZstdCompressor:
+    # ZstdCompressor is not thread-safe, so each pool thread keeps its own,
+    # one per level and dictionary in use.
+    compressors = getattr(_COMPRESSORS, "by_key", None)
+    if compressors is None:
+        compressors = _COMPRESSORS.by_key = {}
+    key = (level, dictionary.id if dictionary else None)
+    if key not in compressors:
+        if dictionary:
+            compressors[key] = zstd.ZstdCompressor(level=level, dict_data=dictionary.data)
+        else:
+            compressors[key] = zstd.ZstdCompressor(level=level)
+    return compressors[key]
+
+
+def compress_raw_block(data: bytes, level: int, dictionary: RawDictionary | None = None) -> bytes:
+    # zstd releases the GIL while compressing, so blocks compress in
+    # parallel with parsing on the main thread.
+    return compressor(level, dictionary).compress(data)
+
+
+def decompress_raw_block(data: bytes, dictionary: RawDictionary | None = None) -> bytes:
+    decompressors = getattr(_DECOMPRESSORS, "by_id", None)
+    if decompressors is None:
+        decompressors = _DECOMPRESSORS.by_id = {}
+    key = dictionary.id if dictionary else None
+    if key not in decompressors:
+        if dictionary:
+            decompressors[key] = zstd.ZstdDecompressor(dict_data=dictionary.data)
+        else:
+            decompressors[key] = zstd.ZstdDecompressor()
+    # decompressobj copes with frames that do not record their content size.
+    return decompressors[key].decompressobj().decompress(data)
+
+
+def sample_blocks(
+    path: str | Path, block_size: int, max_samples: int = RAW_DICT_SAMPLES
+) -> list[bytes]:
+    # Samples are block-sized runs of lines taken at evenly spaced offsets,
+    # i.e. the same shape of input the dictionary will later compress.
+    path = Path(path)
+    size = path.stat().st_size
+    samples: list[bytes] = []
+    with path.open("rb") as handle:
+        for index in range(max_samples):
+            offset = size * index // max_samples
+            handle.seek(offset)
+            if offset:
+                handle.readline()
+            lines = []
+            for _ in range(block_size):
+                raw_line = handle.readline()
+                if not raw_line:
+                    break
+                lines.append(raw_line.rstrip(b"\r\n"))
+            if lines:
+                samples.append(b"\n".join(lines))
+    return samples
+
+
+def train_dictionary(
+    samples: list[bytes], level: int, dict_size: int = RAW_DICT_SIZE
+) -> zstd.ZstdCompressionDict | None:
+    if len(samples) < MIN_DICT_SAMPLES:
+        return None
+    try:
+        return zstd.train_dictionary(dict_size, samples, level=level)
+    except zstd.ZstdError:
+        return None
+
+
+def dictionary_gain(dictionary: zstd.ZstdCompressionDict, samples: list[bytes], level: int) -> float:
+    # Compressed size without the dictionary over the size with it.
+    plain = zstd.ZstdCompressor(level=level)
+    trained = zstd.ZstdCompressor(level=level, dict_data=dictionary)
+    plain_size = sum(len(plain.compress(sample)) for sample in samples)
+    trained_size = sum(len(trained.compress(sample)) for sample in samples)
+    return plain_size / trained_size if trained_size else 1.0
+
+
+def train_file_dictionary(
+    samples: list[bytes], level: int, min_gain: float = RAW_DICT_MIN_GAIN
+) -> tuple[zstd.ZstdCompressionDict | None, float]:
+    # Decoding with a dictionary is somewhat slower, so a dictionary is only
+    # used when it shrinks blocks the training did not see by min_gain.
+    # Small or incompressible files are stored without one.
+    held_out = samples[::DICT_HOLDOUT_EVERY]
+    training = [sample for index, sample in enumerate(samples) if index % DICT_HOLDOUT_EVERY]
+    trained = train_dictionary(training, level)
+    if trained is None or not held_out:
+        return None, 1.0
+    gain = dictionary_gain(trained, held_out, level)
+    return (trained if gain >= min_gain else None), gain
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import os
+import socket
+
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "5000"))
+EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", "5"))
+
+DICT_CACHE_SIZE = int(os.getenv("DICT_CACHE_SIZE", "200000"))
+DICT_RESOLVE_CHUNK = 1000
+
+PARTITION_PRESCAN = os.getenv("PARTITION_PRESCAN", "1") == "1"
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "2"))
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+
+INGEST_SHARDS = int(os.getenv("INGEST_SHARDS", "1"))
+SHARD_MIN_BYTES = int(os.getenv("SHARD_MIN_BYTES", str(256 * 1024 * 1024)))
+
+UNKNOWN_SIGNATURE_CAPACITY = int(os.getenv("UNKNOWN_SIGNATURE_CAPACITY", "2000"))
+UNKNOWN_SIGNATURE_EXAMPLES = int(os.getenv("UNKNOWN_SIGNATURE_EXAMPLES", "3"))
+
+DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "1") == "1"
+DEDUPE_LOOKUP_BATCH = int(os.getenv("DEDUPE_LOOKUP_BATCH", "256"))
+
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "20"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+JOB_NOTIFY_CHANNEL = os.getenv("JOB_NOTIFY_CHANNEL", "phx_jobs")
+JOB_WAIT_TIMEOUT = float(os.getenv("JOB_WAIT_TIMEOUT", "30"))
+
+RAW_BLOCK_SIZE = int(os.getenv("RAW_BLOCK_SIZE", "500"))
+RAW_BLOCK_LEVEL = int(os.getenv("RAW_BLOCK_LEVEL", "10"))
+RAW_BLOCK_THREADS = int(os.getenv("RAW_BLOCK_THREADS", str(os.cpu_count() or 2)))
+RAW_BLOCK_QUEUE = int(os.getenv("RAW_BLOCK_QUEUE", "32"))
+RAW_SEGMENT_MAX_BYTES = int(os.getenv("RAW_SEGMENT_MAX_BYTES", str(256 * 1024 * 1024)))
+
+RAW_DICT_ENABLED = os.getenv("RAW_DICT_ENABLED", "1") == "1"
+RAW_DICT_SIZE = int(os.getenv("RAW_DICT_SIZE", str(112 * 1024)))
+# Held-out samples must compress at least this much smaller with the
+# dictionary, or the file is stored without one.
+RAW_DICT_MIN_GAIN = float(os.getenv("RAW_DICT_MIN_GAIN", "1.1"))
+RAW_DICT_SAMPLES = int(os.getenv("RAW_DICT_SAMPLES", "256"))
+
+REPORT_PACK_YIELD = int(os.getenv("REPORT_PACK_YIELD", "1000"))
+REPORT_PACK_PROGRESS_INTERVAL = int(os.getenv("REPORT_PACK_PROGRESS_INTERVAL", "5000"))
+REPORT_BLOCK_CACHE_SIZE = int(os.getenv("REPORT_BLOCK_CACHE_SIZE", "256"))
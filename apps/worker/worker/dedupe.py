@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .config import DEDUPE_LOOKUP_BATCH
+from .models import BlockFingerprint
+from .normalizer import NOISE_LINES, TIMESTAMP_STYLE_A, TIMESTAMP_STYLE_B, parse_timestamp
+
+# Rows per INSERT, well under Postgres' 65535 bind parameters per statement.
+FINGERPRINT_INSERT_CHUNK = 1000
+
+
+@dataclass(slots=True)
+class Segment:
+    # The raw lines from one timestamp line up to the next: one Discord
+    # embed, the unit overlapping exports share.
+    lines: list[tuple[int, str, int]]
+    occurred_at: datetime | None
+    fingerprint: str | None = None
+    size: int = 0
+
+
+def segment_fingerprint(occurred_at: datetime, lines: Iterable[str]) -> str:
+    # Stripped, non-empty lines only, so line endings and blank lines do not
+    # matter. The resolved timestamp is part of the key: identical embeds
+    # posted at different times stay distinct.
+    digest = hashlib.blake2b(occurred_at.isoformat().encode(), digest_size=16)
+    for line in lines:
+        line = line.strip()
+        if line and line not in NOISE_LINES:
+            digest.update(b"\n")
+            digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BlockDeduper:
+    # Sits between the byte-range reader and normalize_lines. Lines are cut
+    # into segments at timestamp lines and each segment with an absolute
+    # timestamp is fingerprinted; segments already ingested from another
+    # source file are dropped before they are stored, normalized or parsed.
+    #
+    # Only fingerprints written by completed jobs count, so a failed or
+    # still running job never hides blocks whose events were not stored.
+    # Relative and time-only timestamps are resolved against the job date
+    # or an earlier line, which can differ between exports of the same
+    # message, so those segments are always kept.
+    def __init__(
+        self,
+        db: Session,
+        source_file_id: uuid.UUID,
+        ingest_job_id: int,
+        job_date: datetime,
+        last_absolute: datetime | None = None,
+        date_order: str = "DMY",
+        batch: int = DEDUPE_LOOKUP_BATCH,
+    ) -> None:
+        self.db = db
+        self.source_file_id = source_file_id
+        self.ingest_job_id = ingest_job_id
+        self.job_date = job_date
+        self.last_absolute = last_absolute
+        self.date_order = date_order
+        self.batch = batch
+        # Rows for the segments kept since the last commit.
+        self.fingerprints: list[dict] = []
+
+    def filter(
+        self, lines: Iterable[tuple[int, str, int]], end: int
+    ) -> Iterator[tuple[int, str, int, int]]:
+        # Yields (offset, text, global_line_no, skipped). Of a skipped
+        # segment only its timestamp line comes through, with the segment's
+        # size in bytes as `skipped`, so the normalizer still sees every
+        # timestamp and resolves later relative ones against the same last
+        # absolute timestamp. Kept lines have skipped=0. Segments are looked
+        # up up to `batch` ahead of what the caller has consumed, so the
+        # caller does the counting.
+        pending: list[Segment] = []
+        current: Segment | None = None
+        for offset, raw_line, line_no in lines:
+            line = raw_line.strip()
+            match = TIMESTAMP_STYLE_A.match(line) or TIMESTAMP_STYLE_B.match(line)
+            if match:
+                if current is not None:
+                    current.size = offset - current.lines[0][0]
+                    pending.append(current)
+                    if len(pending) >= self.batch:
+                        yield from self._release(pending)
+                        pending = []
+                occurred_at, quality, self.last_absolute = parse_timestamp(
+                    match.group("ts"), self.last_absolute, self.job_date, self.date_order
+                )
+                current = Segment([], occurred_at if quality == "ABSOLUTE" else None)
+            if current is None:
+                # Lines ahead of the first timestamp in the range.
+                yield offset, raw_line, line_no, 0
+            else:
+                current.lines.append((offset, raw_line, line_no))
+        if current is not None:
+            current.size = end - current.lines[0][0]
+            pending.append(current)
+        yield from self._release(pending)
+
+    def _release(self, segments: list[Segment]) -> Iterator[tuple[int, str, int, int]]:
+        for segment in segments:
+            if segment.occurred_at is not None:
+                segment.fingerprint = segment_fingerprint(
+                    segment.occurred_at, (raw_line for _, raw_line, _ in segment.lines[1:])
+                )
+        known = self._ingested([segment.fingerprint for segment in segments if segment.fingerprint])
+        for segment in segments:
+            if segment.fingerprint in known:
+                offset, raw_line, line_no = segment.lines[0]
+                yield offset, raw_line, line_no, segment.size
+                continue
+            if segment.fingerprint:
+                self.fingerprints.append(
+                    {
+                        "fingerprint": segment.fingerprint,
+                        "source_file_id": self.source_file_id,
+                        "ingest_job_id": self.ingest_job_id,
+                        "size": segment.size,
+                    }
+                )
+            for offset, raw_line, line_no in segment.lines:
+                yield offset, raw_line, line_no, 0
+
+    def _ingested(self, fingerprints: list[str]) -> set[str]:
+        if not fingerprints:
+            return set()
+        rows = self.db.execute(
+            text(
+                "SELECT DISTINCT f.fingerprint FROM block_fingerprint f "
+                "JOIN ingest_job j ON j.id = f.ingest_job_id "
+                "WHERE f.fingerprint = ANY(:fingerprints) "
+                "AND f.source_file_id <> :source_file_id AND j.status = 'completed'"
+            ),
+            {"fingerprints": fingerprints, "source_file_id": self.source_file_id},
+        )
+        return {row[0] for row in rows}
+
+    def persist(self) -> None:
+        # Written in the same transaction as the batch's events, in slices:
+        # blocks no parser recognizes add rows without adding events, so
+        # a batch can hold many more fingerprints than events. A segment
+        # repeated within the file is recorded once.
+        #
+        # Rows are queued when a segment is released, which can be ahead of
+        # the restart point, so a row may already exist from an earlier
+        # attempt of this source file whose job died. Conflicts take the row
+        # over for this job; otherwise it would stay tied to a job that
+        # never completes and the block would never count as ingested. An
+        # upsert cannot touch one row twice, so repeats are dropped first.
+        rows = list({row["fingerprint"]: row for row in self.fingerprints}.values())
+        self.fingerprints = []
+        for start in range(0, len(rows), FINGERPRINT_INSERT_CHUNK):
+            chunk = rows[start : start + FINGERPRINT_INSERT_CHUNK]
+            statement = insert(BlockFingerprint).values(chunk)
+            self.db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["fingerprint", "source_file_id"],
+                    set_={"ingest_job_id": statement.excluded.ingest_job_id},
+                )
+            )
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .config import DICT_CACHE_SIZE, DICT_RESOLVE_CHUNK
+from .models import DictContainer, DictEventType, DictItem, DictPlayer
+
+
+class LRUCache:
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> int | None:
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: int) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class DictionaryCache:
+    def __init__(
+        self,
+        model,
+        key_column: str,
+        capacity: int = DICT_CACHE_SIZE,
+        extra_values: Callable[[str], dict] | None = None,
+    ) -> None:
+        self.model = model
+        self.key_column = key_column
+        self.column = getattr(model, key_column)
+        self.cache = LRUCache(capacity)
+        self.extra_values = extra_values
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self, db: Session) -> None:
+        # Newest rows are the most likely to show up again; load them last so
+        # they end up at the hot end of the LRU.
+        rows = db.execute(
+            select(self.model.id, self.column)
+            .order_by(self.model.id.desc())
+            .limit(self.cache.capacity)
+        ).all()
+        with self.lock:
+            for row_id, key in reversed(rows):
+                self.cache.put(key, row_id)
+
+    def get(self, db: Session, key: str) -> int:
+        return self.resolve(db, [key])[key]
+
+    def resolve(self, db: Session, keys: Iterable[str]) -> dict[str, int]:
+        resolved: dict[str, int] = {}
+        missing: set[str] = set()
+        with self.lock:
+            for key in keys:
+                if key in resolved or key in missing:
+                    continue
+                value = self.cache.get(key)
+                if value is None:
+                    missing.add(key)
+                    self.misses += 1
+                else:
+                    resolved[key] = value
+                    self.hits += 1
+        if missing:
+            created = self._create_missing(db, sorted(missing))
+            with self.lock:
+                for key, value in created.items():
+                    self.cache.put(key, value)
+            resolved.update(created)
+        return resolved
+
+    def _create_missing(self, db: Session, keys: list[str]) -> dict[str, int]:
+        # Misses are written in their own short transaction so the unique-index
+        # locks are released immediately instead of being held for a whole
+        # event batch. Keys are sorted so concurrent workers lock them in the
+        # same order; rows another worker created first come back via SELECT.
+        found: dict[str, int] = {}
+        with db.get_bind().begin() as conn:
+            for start in range(0, len(keys), DICT_RESOLVE_CHUNK):
+                chunk = keys[start : start + DICT_RESOLVE_CHUNK]
+                values = [self._row_values(key) for key in chunk]
+                stmt = (
+                    insert(self.model)
+                    .values(values)
+                    .on_conflict_do_nothing(index_elements=[self.key_column])
+                    .returning(self.model.id, self.column)
+                )
+                for row_id, key in conn.execute(stmt):
+                    found[key] = row_id
+                remaining = [key for key in chunk if key not in found]
+                if remaining:
+                    rows = conn.execute(
+                        select(self.model.id, self.column).where(self.column.in_(remaining))
+                    )
+                    for row_id, key in rows:
+                        found[key] = row_id
+        return found
+
+    def _row_values(self, key: str) -> dict:
+        values = {self.key_column: key}
+        if self.extra_values:
+            values.update(self.extra_values(key))
+        return values
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.cache.evictions,
+        }
+
+
+def _container_values(key: str) -> dict:
+    owner = None
+    if key.startswith("portbagaj_"):
+        parts = key.split("_")
+        if len(parts) > 1:
+            owner = parts[1]
+    return {"owner_player_id": owner}
+
+
+class DictionaryResolver:
+    def __init__(self) -> None:
+        self.event_types = DictionaryCache(DictEventType, "key")
+        self.players = DictionaryCache(DictPlayer, "player_id")
+        self.items = DictionaryCache(DictItem, "name")
+        self.containers = DictionaryCache(DictContainer, "key", extra_values=_container_values)
+        self.warmed = False
+
+    def warm(self, db: Session) -> None:
+        if self.warmed:
+            return
+        for cache in (self.event_types, self.players, self.items, self.containers):
+            cache.warm(db)
+        self.warmed = True
+
+    def resolve_rows(self, db: Session, rows: list[dict]) -> None:
+        # Event rows are buffered with the raw player/item/container strings in
+        # their foreign key columns; swap them for ids with one lookup per
+        # dictionary for the whole batch.
+        players = self.players.resolve(
+            db,
+            (
+                value
+                for row in rows
+                for value in (row["src_player_id"], row["dst_player_id"])
+                if value is not None
+            ),
+        )
+        items = self.items.resolve(db, (row["item_id"] for row in rows if row["item_id"] is not None))
+        containers = self.containers.resolve(
+            db, (row["container_id"] for row in rows if row["container_id"] is not None)
+        )
+        for row in rows:
+            if row["src_player_id"] is not None:
+                row["src_player_id"] = players[row["src_player_id"]]
+            if row["dst_player_id"] is not None:
+                row["dst_player_id"] = players[row["dst_player_id"]]
+            if row["item_id"] is not None:
+                row["item_id"] = items[row["item_id"]]
+            if row["container_id"] is not None:
+                row["container_id"] = containers[row["container_id"]]
+
+    def stats(self) -> dict:
+        return {
+            "event_types": self.event_types.stats(),
+            "players": self.players.stats(),
+            "items": self.items.stats(),
+            "containers": self.containers.stats(),
+        }
+
+
+dictionaries = DictionaryResolver()
@@ -1,45 +1,100 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import logging
-import re
+import multiprocessing
+import threading
+import time
 import uuid
 from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
 import zstandard as zstd
 from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from .compression import (
+    RawDictionary,
+    compress_raw_block,
+    compression_pool,
+    sample_blocks,
+    train_file_dictionary,
+)
+from .config import (
+    DEDUPE_ENABLED,
+    EVENT_BATCH_SIZE,
+    EVENT_FLUSH_INTERVAL,
+    INGEST_SHARDS,
+    PARTITION_PRESCAN,
+    RAW_BLOCK_LEVEL,
+    RAW_BLOCK_QUEUE,
+    RAW_BLOCK_SIZE,
+    RAW_DICT_ENABLED,
+    RAW_SEGMENT_MAX_BYTES,
+    SHARD_MIN_BYTES,
+    WORKER_ID,
+)
+from .db import SessionLocal
+from .dedupe import BlockDeduper
+from .dictionaries import DictionaryResolver, dictionaries
+from .job_queue import LeaseHeartbeat, LeaseLost, claim_next_job, release_job
 from .models import (
-    DictContainer,
-    DictEventType,
-    DictItem,
-    DictPlayer,
     Event,
     IngestJob,
     RawBlock,
     SourceFile,
     UnknownSignature,
+    ZstdDictionary,
 )
 from .normalizer import TIMEZONE, normalize_lines
-from .object_store import object_store
-from .parsers import PARSERS, EventData, NormalizedBlock
+from .object_store import SegmentFile, object_store
+from .partitions import PartitionManager, partitions, prescan_months
+from .parsers import EventData, NormalizedBlock, parsers_for
+from .sharding import Shard, iter_line_offsets, plan_shards
+from .signatures import SignatureSketch, normalize_signature
+
+
+# Rows per INSERT, well under Postgres' 65535 bind parameters per statement.
+EVENT_INSERT_CHUNK = 1000
+RAW_BLOCK_INSERT_CHUNK = 1000
+CHECKPOINT_SIGNATURES = 500
+
+_RAW_DICTIONARIES: dict[uuid.UUID, RawDictionary] = {}
 
 
 class RawBlockWriter:
-    def __init__(self, db: Session, source_file_id: uuid.UUID, block_size: int = 500) -> None:
+    def __init__(
+        self,
+        db: Session,
+        source_file_id: uuid.UUID,
+        block_size: int = RAW_BLOCK_SIZE,
+        compression_level: int = RAW_BLOCK_LEVEL,
+        dictionary: RawDictionary | None = None,
+        on_flush: Callable[[], None] | None = None,
+    ) -> None:
         self.db = db
         self.source_file_id = source_file_id
         self.block_size = block_size
+        self.compression_level = compression_level
+        self.dictionary = dictionary
+        self.on_flush = on_flush
         self.lines: list[str] = []
         self.block_id = uuid.uuid4()
+        self.pending: list[tuple[Future, dict]] = []
+        self.slots = threading.BoundedSemaphore(RAW_BLOCK_QUEUE)
+        self.segment = SegmentFile(str(source_file_id), RAW_SEGMENT_MAX_BYTES)
+        # A single appender thread writes frames in submission order, which
+        # keeps segment offsets deterministic while compression runs wide.
+        self.appender = ThreadPoolExecutor(max_workers=1, thread_name_prefix="raw-segment")
 
-    def append(self, line: str) -> tuple[str, int]:
-        raw_block_id = str(self.block_id)
+    def append(self, line: str) -> tuple[uuid.UUID, int]:
+        raw_block_id = self.block_id
         index = len(self.lines)
         self.lines.append(line)
         if len(self.lines) >= self.block_size:
@@ -49,132 +104,571 @@ class RawBlockWriter:
     def flush(self) -> None:
         if not self.lines:
             return
-        path = object_store.raw_block_path(self.source_file_id, self.block_id)
-        compressor = zstd.ZstdCompressor(level=10)
         data = "\n".join(self.lines).encode("utf-8")
-        with path.open("wb") as handle:
-            handle.write(compressor.compress(data))
-        raw_block = RawBlock(
-            id=self.block_id,
-            source_file_id=self.source_file_id,
-            uri=str(path),
-            codec="zstd",
-            line_count=len(self.lines),
-            created_at=datetime.utcnow(),
+        # Blocks once RAW_BLOCK_QUEUE blocks are in flight so a slow disk
+        # cannot make the writer buffer the whole file in memory.
+        self.slots.acquire()
+        try:
+            compressed = compression_pool().submit(
+                compress_raw_block, data, self.compression_level, self.dictionary
+            )
+            appended = self.appender.submit(self._append, compressed)
+        except BaseException:
+            self.slots.release()
+            raise
+        appended.add_done_callback(lambda _: self.slots.release())
+        self.pending.append(
+            (
+                appended,
+                {
+                    "id": self.block_id,
+                    "source_file_id": self.source_file_id,
+                    "codec": "zstd",
+                    "dictionary_id": self.dictionary.id if self.dictionary else None,
+                    "line_count": len(self.lines),
+                    "created_at": datetime.utcnow(),
+                },
+            )
         )
-        self.db.add(raw_block)
-        self.db.commit()
         self.lines = []
         self.block_id = uuid.uuid4()
+        if self.on_flush:
+            self.on_flush()
+
+    def persist(self) -> None:
+        # Waits for the in-flight writes and inserts their RawBlock rows in
+        # slices; must run before events referencing them are written.
+        if not self.pending:
+            return
+        rows = []
+        for future, row in self.pending:
+            uri, offset, length = future.result()
+            row.update(uri=uri, byte_offset=offset, byte_length=length)
+            rows.append(row)
+        self.pending = []
+        for start in range(0, len(rows), RAW_BLOCK_INSERT_CHUNK):
+            self.db.execute(insert(RawBlock).values(rows[start : start + RAW_BLOCK_INSERT_CHUNK]))
+
+    def close(self) -> None:
+        self.appender.shutdown(wait=True)
+        self.segment.close()
+
+    def _append(self, compressed: Future) -> tuple[str, int, int]:
+        return self.segment.append(compressed.result())
+
+
+class EventSink:
+    def __init__(
+        self,
+        db: Session,
+        resolver: DictionaryResolver,
+        partition_manager: PartitionManager,
+        batch_size: int = EVENT_BATCH_SIZE,
+        flush_interval: float = EVENT_FLUSH_INTERVAL,
+    ) -> None:
+        self.db = db
+        self.resolver = resolver
+        self.partition_manager = partition_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows: list[dict] = []
+        self.buffered = 0
+        self.inserted = 0
+        self.last_flush = time.monotonic()
+
+    def add(self, values: dict) -> None:
+        self.rows.append(values)
+        self.buffered += 1
+
+    @property
+    def due(self) -> bool:
+        if len(self.rows) >= self.batch_size:
+            return True
+        return time.monotonic() - self.last_flush >= self.flush_interval
+
+    def flush(self) -> None:
+        self.resolver.resolve_rows(self.db, self.rows)
+        self.partition_manager.ensure_for(self.db, (row["occurred_at"] for row in self.rows))
+        for start in range(0, len(self.rows), EVENT_INSERT_CHUNK):
+            chunk = self.rows[start : start + EVENT_INSERT_CHUNK]
+            stmt = insert(Event).values(chunk).on_conflict_do_nothing(
+                index_elements=["dedupe_key"]
+            )
+            result = self.db.execute(stmt)
+            self.inserted += max(result.rowcount or 0, 0)
+        self.rows = []
+        self.last_flush = time.monotonic()
+
+
+@dataclass
+class IngestStats:
+    event_type_counts: Counter[str] = field(default_factory=Counter)
+    parser_counts: Counter[str] = field(default_factory=Counter)
+    ts_quality_counts: Counter[str] = field(default_factory=Counter)
+    unknown_signatures: SignatureSketch = field(default_factory=SignatureSketch)
+    events_buffered: int = 0
+    events_inserted: int = 0
+    blocks_skipped: int = 0
+    bytes_skipped: int = 0
+    dictionary_cache: dict = field(default_factory=dict)
+
+    def merge(self, other: IngestStats) -> None:
+        self.event_type_counts.update(other.event_type_counts)
+        self.parser_counts.update(other.parser_counts)
+        self.ts_quality_counts.update(other.ts_quality_counts)
+        self.unknown_signatures.merge(other.unknown_signatures)
+        self.events_buffered += other.events_buffered
+        self.events_inserted += other.events_inserted
+        self.blocks_skipped += other.blocks_skipped
+        self.bytes_skipped += other.bytes_skipped
+        for name, counters in other.dictionary_cache.items():
+            merged = self.dictionary_cache.setdefault(name, {})
+            for key, value in counters.items():
+                merged[key] = merged.get(key, 0) + value
+
+    def to_json(self) -> dict:
+        # Checkpoint form. Only the most frequent unknown signatures are
+        # kept, so a resumed job's signature counts are approximate.
+        return {
+            "event_type_counts": dict(self.event_type_counts),
+            "parser_counts": dict(self.parser_counts),
+            "ts_quality_counts": dict(self.ts_quality_counts),
+            "unknown_signatures": self.unknown_signatures.to_json(CHECKPOINT_SIGNATURES),
+            "events_buffered": self.events_buffered,
+            "events_inserted": self.events_inserted,
+            "blocks_skipped": self.blocks_skipped,
+            "bytes_skipped": self.bytes_skipped,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> IngestStats:
+        return cls(
+            event_type_counts=Counter(data.get("event_type_counts", {})),
+            parser_counts=Counter(data.get("parser_counts", {})),
+            ts_quality_counts=Counter(data.get("ts_quality_counts", {})),
+            unknown_signatures=SignatureSketch.from_json(data.get("unknown_signatures") or {}),
+            events_buffered=data.get("events_buffered", 0),
+            events_inserted=data.get("events_inserted", 0),
+            blocks_skipped=data.get("blocks_skipped", 0),
+            bytes_skipped=data.get("bytes_skipped", 0),
+        )
+
+
+class ShardCancelled(RuntimeError):
+    pass
 
 
 class IngestRunner:
-    def __init__(self, db: Session) -> None:
+    def __init__(self, db: Session, worker_id: str = WORKER_ID, stop=None) -> None:
         self.db = db
         self.logger = logging.getLogger("phx.worker")
+        self.lease: LeaseHeartbeat | None = None
+        # Shard processes get the parent's worker id (they do not hold the
+        # lease themselves) and an event the parent sets to stop them.
+        self.worker_id = worker_id
+        self.stop = stop
 
     def run_next_job(self) -> bool:
-        job = (
-            self.db.query(IngestJob)
-            .filter(IngestJob.status == "queued")
-            .order_by(IngestJob.created_at)
-            .first()
-        )
+        job = claim_next_job(self.db)
         if not job:
             return False
-        self.logger.info("Starting ingest job %s", job.id)
-        job.status = "running"
-        job.updated_at = datetime.utcnow()
-        self.db.commit()
-        try:
-            self._process_job(job)
-            job.status = "completed"
-            job.updated_at = datetime.utcnow()
-            self.db.commit()
+        self.logger.info("Starting ingest job %s (attempt %s)", job.id, job.attempts)
+        with LeaseHeartbeat(job.id) as lease:
+            self.lease = lease
+            try:
+                self._process_job(job)
+                status, error_text = "completed", None
+            except Exception as exc:  # noqa: BLE001
+                self.db.rollback()
+                status, error_text = "failed", str(exc)
+                self.logger.exception("Failed ingest job %s", job.id)
+            finally:
+                self.lease = None
+        if not release_job(self.db, job, status, error_text):
+            self.logger.warning("Ingest job %s was taken over by another worker", job.id)
+        elif status == "completed":
             self.logger.info("Completed ingest job %s", job.id)
-        except Exception as exc:  # noqa: BLE001
-            job.status = "failed"
-            job.error_text = str(exc)
-            job.updated_at = datetime.utcnow()
-            self.db.commit()
-            self.logger.exception("Failed ingest job %s", job.id)
         return True
 
     def _process_job(self, job: IngestJob) -> None:
         source_file = self.db.get(SourceFile, job.source_file_id)
         if not source_file:
             raise ValueError("Source file missing")
-        writer = RawBlockWriter(self.db, source_file.id)
-        unknown_signatures: Counter[str] = Counter()
-        event_type_counts: Counter[str] = Counter()
-        parser_counts: Counter[str] = Counter()
-        ts_quality_counts: Counter[str] = Counter()
-        job_date = datetime.now(TIMEZONE)
-        global_line_no = 0
+        # A job whose previous attempt died resumes with the same job date,
+        # dictionary and shard plan, so its checkpoints stay valid.
+        progress = job.progress_json or {}
+        resuming = "plan" in progress
+        if resuming:
+            job_date = datetime.fromisoformat(progress["job_date"])
+            dictionary_id = uuid.UUID(progress["dictionary_id"]) if progress["dictionary_id"] else None
+            dictionary = load_raw_dictionary(self.db, dictionary_id) if dictionary_id else None
+            shards = [Shard.from_json(shard) for shard in progress["plan"]]
+            self.logger.info("Resuming ingest job %s from its checkpoints", job.id)
+        else:
+            job_date = datetime.now(TIMEZONE)
+            if PARTITION_PRESCAN:
+                # Create every monthly partition the file needs up front so no
+                # event is routed to the default partition.
+                partitions.ensure_months(self.db, prescan_months(source_file.uri, job_date))
+            dictionary = self._train_dictionary(job, source_file)
+            dictionary_id = dictionary.id if dictionary else None
+            dedupe_sha256 = self._dedupe_digest(source_file)
 
-        def line_iterator():
-            nonlocal global_line_no
-            with Path(source_file.uri).open("r", encoding="utf-8", errors="replace") as handle:
-                for raw_line in handle:
-                    raw_line = raw_line.rstrip("\n")
-                    raw_block_id, raw_line_index = writer.append(raw_line)
-                    global_line_no += 1
-                    yield raw_line, raw_block_id, raw_line_index, global_line_no
-            writer.flush()
+            shards = []
+            if INGEST_SHARDS > 1 and source_file.size >= SHARD_MIN_BYTES:
+                shards = plan_shards(source_file.uri, INGEST_SHARDS, job_date)
+            job.progress_json = {
+                "job_date": job_date.isoformat(),
+                "dictionary_id": str(dictionary_id) if dictionary_id else None,
+                "plan": [shard.to_json() for shard in shards],
+                "dedupe_sha256": dedupe_sha256,
+                "bytes_total": source_file.size,
+                "checkpoints": {},
+            }
+            self.db.commit()
 
-        for block in normalize_lines(line_iterator(), job_date):
-            parsed_any = False
-            ts_quality_counts[block.occurred_at_quality] += 1
-            for parser in PARSERS:
-                if parser.match(block):
-                    for event in parser.parse(block):
-                        self._store_event(job, source_file, block, event, parser)
-                        event_type_counts[event.event_type] += 1
-                        parser_counts[parser.parser_id] += 1
-                        parsed_any = True
-            if not parsed_any:
-                for payload in block.payload:
-                    signature = normalize_signature(payload.text)
-                    unknown_signatures[signature] += 1
+        if len(shards) > 1:
+            self.logger.info("Ingest job %s split into %s shards", job.id, len(shards))
+            stats = IngestStats()
+            pool = _shard_pool()
+            stop = _shard_manager().Event()
+            futures = [
+                pool.submit(
+                    _ingest_shard, job.id, shard, job_date, dictionary_id, self.worker_id, stop
+                )
+                for shard in shards
+            ]
+            try:
+                for future in futures:
+                    stats.merge(future.result())
+            except BaseException:
+                # Stop the other shards at their next commit and wait for
+                # them, so nothing is still writing once the job is released.
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+                raise
+        else:
+            shard = shards[0] if shards else None
+            stats = self.ingest_range(job, source_file, job_date, shard, dictionary)
 
-        for signature, count in unknown_signatures.most_common(50):
+        top_signatures = stats.unknown_signatures.most_common(50)
+        for signature, entry in top_signatures:
             self.db.add(
                 UnknownSignature(
                     ingest_job_id=job.id,
                     signature=signature,
-                    count=count,
+                    count=entry.count,
+                    examples=entry.examples,
                 )
             )
         job.stats_json = {
-            "event_type_counts": event_type_counts.most_common(),
-            "parser_counts": parser_counts.most_common(),
-            "unknown_signatures": unknown_signatures.most_common(50),
-            "ts_quality_counts": ts_quality_counts.most_common(),
+            "event_type_counts": stats.event_type_counts.most_common(),
+            "parser_counts": stats.parser_counts.most_common(),
+            "unknown_signatures": [[signature, entry.count] for signature, entry in top_signatures],
+            "unknown_signature_examples": {
+                signature: entry.examples for signature, entry in top_signatures
+            },
+            "unknown_lines": stats.unknown_signatures.total,
+            "ts_quality_counts": stats.ts_quality_counts.most_common(),
+            "events_buffered": stats.events_buffered,
+            "events_inserted": stats.events_inserted,
+            "blocks_skipped": stats.blocks_skipped,
+            "bytes_skipped": stats.bytes_skipped,
+            "dictionary_cache": stats.dictionary_cache,
+            "shards": max(len(shards), 1),
+            "zstd_dictionary_id": str(dictionary_id) if dictionary_id else None,
         }
         self.db.commit()
 
+    def _dedupe_digest(self, source_file: SourceFile) -> str:
+        # Event dedupe keys start with the file's sha256. Uploads hashed
+        # with leaf hashing have a different sha256 than the same bytes
+        # uploaded before it, so a re-upload of a legacy file would get new
+        # keys and duplicate its events. When a legacy file of the same size
+        # exists, the plain SHA-256 is computed and, if it matches, the
+        # legacy digest is used for the keys.
+        if source_file.hash_scheme is None:
+            return source_file.sha256
+        legacy = set(
+            self.db.execute(
+                text(
+                    "SELECT sha256 FROM source_file "
+                    "WHERE hash_scheme IS NULL AND size = :size AND id <> :id"
+                ),
+                {"size": source_file.size, "id": source_file.id},
+            ).scalars()
+        )
+        if not legacy:
+            return source_file.sha256
+        digest = hashlib.sha256()
+        with open(source_file.uri, "rb") as handle:
+            while chunk := handle.read(1024 * 1024):
+                digest.update(chunk)
+        plain = digest.hexdigest()
+        if plain in legacy:
+            self.logger.info("Source file %s is a re-upload of legacy file %s", source_file.id, plain)
+            return plain
+        return source_file.sha256
+
+    def _train_dictionary(self, job: IngestJob, source_file: SourceFile) -> RawDictionary | None:
+        # Raw blocks are small and highly repetitive, so they compress far
+        # better against a dictionary trained on the file itself. The
+        # dictionary is an immutable object; blocks reference it by id.
+        options = job.options_json or {}
+        if not options.get("zstd_dictionary", RAW_DICT_ENABLED):
+            return None
+        block_size = options.get("raw_block_size") or RAW_BLOCK_SIZE
+        level = options.get("compression_level") or RAW_BLOCK_LEVEL
+        samples = sample_blocks(source_file.uri, block_size)
+        trained, gain = train_file_dictionary(samples, level)
+        if trained is None:
+            self.logger.info(
+                "No zstd dictionary for job %s (held-out gain %.2fx)", job.id, gain
+            )
+            return None
+        data = trained.as_bytes()
+        dictionary_id = uuid.uuid4()
+        path = object_store.dictionary_path(str(dictionary_id))
+        path.write_bytes(data)
+        self.db.add(
+            ZstdDictionary(
+                id=dictionary_id,
+                source_file_id=source_file.id,
+                dict_id=trained.dict_id(),
+                uri=str(path),
+                size=len(data),
+                sample_count=len(samples),
+            )
+        )
+        self.db.commit()
+        dictionary = RawDictionary(dictionary_id, trained)
+        _RAW_DICTIONARIES[dictionary_id] = dictionary
+        return dictionary
+
+    def ingest_range(
+        self,
+        job: IngestJob,
+        source_file: SourceFile,
+        job_date: datetime,
+        shard: Shard | None = None,
+        dictionary: RawDictionary | None = None,
+    ) -> IngestStats:
+        dictionaries.warm(self.db)
+        sink = EventSink(self.db, dictionaries, partitions)
+
+        options = job.options_json or {}
+        range_key = str(shard.index if shard else 0)
+        start = shard.start if shard else 0
+        end = shard.end if shard else None
+        range_end = end if end is not None else source_file.size
+        global_line_no = shard.line_offset if shard else 0
+        last_absolute = shard.last_absolute if shard else None
+
+        stats = IngestStats()
+        # Jobs planned before dedupe_sha256 was recorded keep their keys.
+        dedupe_sha256 = (job.progress_json or {}).get("dedupe_sha256") or source_file.sha256
+        restored = ((job.progress_json or {}).get("checkpoints") or {}).get(range_key)
+        if restored:
+            stats = IngestStats.from_json(restored["stats"])
+            if restored.get("done"):
+                self.logger.info("Job %s range %s already ingested", job.id, range_key)
+                return stats
+            start = restored["offset"]
+            global_line_no = restored["global_line_no"]
+            last_absolute = (
+                datetime.fromisoformat(restored["last_absolute"]) if restored["last_absolute"] else None
+            )
+        base_buffered = stats.events_buffered
+        base_inserted = stats.events_inserted
+        base_blocks_skipped = stats.blocks_skipped
+        base_bytes_skipped = stats.bytes_skipped
+        resumed_at = start
+        resumed_lines = global_line_no
+        started = time.monotonic()
+
+        # The restart point is the timestamp line of the block normalize_lines
+        # is still collecting: every block before it has been parsed and its
+        # events are in the sink, so a checkpoint written with the batch that
+        # persists them never loses or repeats an event. It also carries the
+        # blocks skipped by dedupe before it, for the same reason.
+        position = start
+        blocks_skipped = 0
+        bytes_skipped = 0
+        restart = (start, global_line_no, last_absolute, 0, 0)
+
+        def on_block_start(line_no: int, block_last_absolute: datetime | None) -> None:
+            nonlocal restart
+            restart = (position, line_no - 1, block_last_absolute, blocks_skipped, bytes_skipped)
+
+        def checkpoint(done: bool = False) -> dict:
+            offset, line_no, restart_absolute, restart_blocks, restart_bytes = (
+                (range_end, global_line_no, None, blocks_skipped, bytes_skipped) if done else restart
+            )
+            elapsed = max(time.monotonic() - started, 1e-6)
+            stats.events_buffered = base_buffered + sink.buffered
+            stats.events_inserted = base_inserted + sink.inserted
+            stats.blocks_skipped = base_blocks_skipped + restart_blocks
+            stats.bytes_skipped = base_bytes_skipped + restart_bytes
+            return {
+                "offset": offset,
+                "global_line_no": line_no,
+                "last_absolute": restart_absolute.isoformat() if restart_absolute else None,
+                "range_start": shard.start if shard else 0,
+                "range_end": range_end,
+                "bytes_done": offset - (shard.start if shard else 0),
+                "lines_done": line_no - (shard.line_offset if shard else 0),
+                "bytes_per_sec": round((offset - resumed_at) / elapsed),
+                "lines_per_sec": round((line_no - resumed_lines) / elapsed),
+                "updated_at": datetime.utcnow().isoformat(),
+                "stats": stats.to_json(),
+                "done": done,
+            }
+
+        def commit_if_due() -> None:
+            # Called at every raw block boundary: all events parsed so far
+            # reference blocks the writer has already handed off.
+            if sink.due:
+                self._commit_batch(writer, sink, deduper, job.id, range_key, checkpoint)
+
+        writer = RawBlockWriter(
+            self.db,
+            source_file.id,
+            block_size=options.get("raw_block_size") or RAW_BLOCK_SIZE,
+            compression_level=options.get("compression_level") or RAW_BLOCK_LEVEL,
+            dictionary=dictionary,
+            on_flush=commit_if_due,
+        )
+
+        # Regions already ingested from an overlapping export are dropped
+        # here, before they reach the raw block writer or the normalizer.
+        deduper = None
+        if options.get("dedupe", DEDUPE_ENABLED):
+            deduper = BlockDeduper(self.db, source_file.id, job.id, job_date, last_absolute)
+
+        def numbered_lines():
+            nonlocal global_line_no
+            for offset, raw_line in iter_line_offsets(source_file.uri, start, end):
+                global_line_no += 1
+                yield offset, raw_line, global_line_no
+
+        def line_iterator():
+            nonlocal position, blocks_skipped, bytes_skipped
+            lines = numbered_lines()
+            if deduper:
+                lines = deduper.filter(lines, range_end)
+            else:
+                lines = (line + (0,) for line in lines)
+            for offset, raw_line, line_no, skipped in lines:
+                position = offset
+                if not skipped:
+                    raw_block_id, raw_line_index = writer.append(raw_line)
+                    yield raw_line, raw_block_id, raw_line_index, line_no
+                    continue
+                # Timestamp line of a skipped block: nothing is stored or
+                # parsed for it. It is counted only once normalize_lines has
+                # taken it as a block start, so a restart point at this
+                # line does not include it.
+                yield raw_line, None, None, line_no
+                blocks_skipped += 1
+                bytes_skipped += skipped
+            writer.flush()
+
+        try:
+            blocks = normalize_lines(
+                line_iterator(), job_date, last_absolute=last_absolute, on_block_start=on_block_start
+            )
+            for block in blocks:
+                parsed_any = False
+                stats.ts_quality_counts[block.occurred_at_quality] += 1
+                for parser in parsers_for(block):
+                    for event in parser.parse(block):
+                        self._store_event(sink, job, source_file, dedupe_sha256, block, event, parser)
+                        stats.event_type_counts[event.event_type] += 1
+                        stats.parser_counts[parser.parser_id] += 1
+                        parsed_any = True
+                if not parsed_any:
+                    for payload in block.payload:
+                        signature = normalize_signature(payload.text)
+                        stats.unknown_signatures.add(signature, payload.text)
+
+            self._commit_batch(
+                writer, sink, deduper, job.id, range_key, lambda: checkpoint(done=True)
+            )
+        finally:
+            writer.close()
+        stats.events_buffered = base_buffered + sink.buffered
+        stats.events_inserted = base_inserted + sink.inserted
+        stats.blocks_skipped = base_blocks_skipped + blocks_skipped
+        stats.bytes_skipped = base_bytes_skipped + bytes_skipped
+        stats.dictionary_cache = dictionaries.stats()
+        return stats
+
+    def _commit_batch(
+        self,
+        writer: RawBlockWriter,
+        sink: EventSink,
+        deduper: BlockDeduper | None,
+        job_id: int,
+        range_key: str,
+        checkpoint: Callable[[], dict],
+    ) -> None:
+        # One transaction per batch: the RawBlock rows first, then the events
+        # pointing at them and the new block fingerprints, then the
+        # checkpoint they bring the range up to. jsonb_set touches only this
+        # range's key, so shards running in other processes never overwrite
+        # each other's checkpoints. The checkpoint only lands while this
+        # worker still holds an unexpired lease; otherwise the whole batch
+        # is rolled back, in the parent and in shard processes alike.
+        if self.lease:
+            self.lease.check()
+        if self.stop is not None and self.stop.is_set():
+            raise ShardCancelled(f"Ingest job {job_id} range {range_key} cancelled")
+        writer.persist()
+        sink.flush()
+        if deduper:
+            deduper.persist()
+        result = self.db.execute(
+            text(
+                "UPDATE ingest_job SET progress_json = jsonb_set("
+                "coalesce(progress_json, '{}'::jsonb), "
+                "ARRAY['checkpoints', CAST(:range_key AS text)], "
+                "CAST(:checkpoint AS jsonb), true), "
+                "updated_at = now() WHERE id = :job_id AND worker_id = :worker_id "
+                "AND status = 'running' AND lease_expires_at > now()"
+            ),
+            {
+                "range_key": range_key,
+                "checkpoint": json.dumps(checkpoint()),
+                "job_id": job_id,
+                "worker_id": self.worker_id,
+            },
+        )
+        if result.rowcount == 0:
+            self.db.rollback()
+            raise LeaseLost(f"Lease on ingest_job {job_id} was lost")
+        self.db.commit()
+
     def _store_event(
         self,
+        sink: EventSink,
         job: IngestJob,
         source_file: SourceFile,
+        dedupe_sha256: str,
         block: NormalizedBlock,
         event: EventData,
         parser,
     ) -> None:
-        event_type_id = self._get_or_create_event_type(event.event_type)
         if event.global_line_no is None:
             self.logger.warning("Skipping event without global line no: %s", event)
             return
-        src_id = self._get_or_create_player(event.src_player_id) if event.src_player_id else None
-        dst_id = self._get_or_create_player(event.dst_player_id) if event.dst_player_id else None
-        item_id = self._get_or_create_item(event.item) if event.item else None
-        container_id = self._get_or_create_container(event.container) if event.container else None
+        event_type_id = dictionaries.event_types.get(self.db, event.event_type)
 
         dedupe_seed = (
-            f"{source_file.sha256}:{event.global_line_no}:{event_type_id}:{event.event_type}"
+            f"{dedupe_sha256}:{event.global_line_no}:{event_type_id}:{event.event_type}"
         )
         dedupe_key = hashlib.sha256(dedupe_seed.encode("utf-8")).hexdigest()
-        self._ensure_partition(block.occurred_at)
         event_values = {
             "id": uuid.uuid4(),
             "source_file_id": source_file.id,
@@ -184,121 +678,75 @@ class IngestRunner:
             "occurred_at": block.occurred_at,
             "occurred_at_quality": block.occurred_at_quality,
             "event_type_id": event_type_id,
-            "src_player_id": src_id,
-            "dst_player_id": dst_id,
-            "item_id": item_id,
-            "container_id": container_id,
+            # Resolved to dictionary ids in bulk when the sink flushes.
+            "src_player_id": event.src_player_id or None,
+            "dst_player_id": event.dst_player_id or None,
+            "item_id": event.item or None,
+            "container_id": event.container or None,
             "money": event.money,
             "qty": event.qty,
             "metadata": event.metadata or {},
-            "raw_block_id": uuid.UUID(event.raw_block_id),
+            "raw_block_id": event.raw_block_id,
             "raw_line_index": event.raw_line_index,
             "global_line_no": event.global_line_no,
             "dedupe_key": dedupe_key,
             "created_at": datetime.utcnow(),
         }
-        stmt = insert(Event).values(**event_values).on_conflict_do_nothing(
-            index_elements=["dedupe_key"]
-        )
-        try:
-            self.db.execute(stmt)
-            self.db.commit()
-        except IntegrityError:
-            self.db.rollback()
+        sink.add(event_values)
 
-    def _get_or_create_event_type(self, key: str) -> int:
-        row = self.db.query(DictEventType).filter(DictEventType.key == key).one_or_none()
-        if row:
-            return row.id
-        row = DictEventType(key=key)
-        self.db.add(row)
-        self.db.commit()
-        return row.id
-
-    def _get_or_create_item(self, name: str) -> int:
-        row = self.db.query(DictItem).filter(DictItem.name == name).one_or_none()
-        if row:
-            return row.id
-        row = DictItem(name=name)
-        self.db.add(row)
-        self.db.commit()
-        return row.id
-
-    def _get_or_create_container(self, key: str) -> int:
-        row = self.db.query(DictContainer).filter(DictContainer.key == key).one_or_none()
-        if row:
-            return row.id
-        owner = None
-        if key.startswith("portbagaj_"):
-            parts = key.split("_")
-            if len(parts) > 1:
-                owner = parts[1]
-        row = DictContainer(key=key, owner_player_id=owner)
-        self.db.add(row)
-        self.db.commit()
-        return row.id
-
-    def _get_or_create_player(self, player_id: str) -> int:
-        row = self.db.query(DictPlayer).filter(DictPlayer.player_id == player_id).one_or_none()
-        if row:
-            return row.id
-        row = DictPlayer(player_id=player_id)
-        self.db.add(row)
-        self.db.commit()
-        return row.id
 
-    def _ensure_partition(self, occurred_at: datetime | None) -> None:
-        if not occurred_at:
-            return
-        month_start = datetime(occurred_at.year, occurred_at.month, 1)
-        if occurred_at.month == 12:
-            month_end = datetime(occurred_at.year + 1, 1, 1)
-        else:
-            month_end = datetime(occurred_at.year, occurred_at.month + 1, 1)
-        partition_name = f"event_{month_start:%Y_%m}"
-        self.db.execute(
-            text(
-                """
-                DO $$
-                BEGIN
-                    IF NOT EXISTS (
-                        SELECT 1 FROM pg_class WHERE relname = :partition_name
-                    ) THEN
-                        EXECUTE format(
-                            'CREATE TABLE %I PARTITION OF event FOR VALUES FROM (%L) TO (%L)',
-                            :partition_name,
-                            :start,
-                            :end
-                        );
-                        EXECUTE format(
-                            'CREATE UNIQUE INDEX %I ON %I (dedupe_key)',
-                            :partition_name || '_dedupe_key_uq',
-                            :partition_name
-                        );
-                        EXECUTE format(
-                            'CREATE INDEX %I ON %I (ingest_job_id, occurred_at)',
-                            :partition_name || '_job_time_idx',
-                            :partition_name
-                        );
-                        EXECUTE format(
-                            'CREATE INDEX %I ON %I (ingest_job_id, event_type_id)',
-                            :partition_name || '_job_type_idx',
-                            :partition_name
-                        );
-                    END IF;
-                END $$;
-                """
-            ),
-            {
-                "partition_name": partition_name,
-                "start": month_start.isoformat(),
-                "end": month_end.isoformat(),
-            },
+_SHARD_POOL: ProcessPoolExecutor | None = None
+
+
+def _shard_pool() -> ProcessPoolExecutor:
+    # Kept for the life of the worker so shard processes reuse their warm
+    # dictionary caches and database connections across jobs.
+    global _SHARD_POOL
+    if _SHARD_POOL is None:
+        _SHARD_POOL = ProcessPoolExecutor(
+            max_workers=INGEST_SHARDS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_shard_process,
         )
-        self.db.commit()
+    return _SHARD_POOL
+
+
+_SHARD_MANAGER = None
+
+
+def _shard_manager():
+    # Serves the per-job stop events shard processes poll; started once,
+    # like the pool.
+    global _SHARD_MANAGER
+    if _SHARD_MANAGER is None:
+        _SHARD_MANAGER = multiprocessing.get_context("spawn").Manager()
+    return _SHARD_MANAGER
+
+
+def _init_shard_process() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+
+def _ingest_shard(
+    job_id: int,
+    shard: Shard,
+    job_date: datetime,
+    dictionary_id: uuid.UUID | None,
+    worker_id: str,
+    stop,
+) -> IngestStats:
+    with SessionLocal() as db:
+        job = db.get(IngestJob, job_id)
+        source_file = db.get(SourceFile, job.source_file_id)
+        dictionary = load_raw_dictionary(db, dictionary_id) if dictionary_id else None
+        runner = IngestRunner(db, worker_id, stop)
+        return runner.ingest_range(job, source_file, job_date, shard, dictionary)
 
 
-def normalize_signature(text: str) -> str:
-    text = re.sub(r"\d+", "<#>", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip().lower()
+def load_raw_dictionary(db: Session, dictionary_id: uuid.UUID) -> RawDictionary:
+    dictionary = _RAW_DICTIONARIES.get(dictionary_id)
+    if dictionary is None:
+        row = db.get(ZstdDictionary, dictionary_id)
+        data = zstd.ZstdCompressionDict(Path(row.uri).read_bytes())
+        dictionary = _RAW_DICTIONARIES[dictionary_id] = RawDictionary(dictionary_id, data)
+    return dictionary
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import psycopg
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from .config import (
+    JOB_HEARTBEAT_INTERVAL,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_NOTIFY_CHANNEL,
+    JOB_WAIT_TIMEOUT,
+    WORKER_ID,
+)
+from .db import LIBPQ_URL, SessionLocal
+from .models import IngestJob
+
+logger = logging.getLogger("phx.worker.queue")
+
+
+class LeaseLost(RuntimeError):
+    pass
+
+
+def claim_next_job(db: Session, worker_id: str = WORKER_ID, model=IngestJob):
+    # Queued jobs and running jobs whose lease ran out (their worker died)
+    # are both claimable. SKIP LOCKED lets several workers poll at once
+    # without blocking on, or double-claiming, the same row. Lease times use
+    # the database clock so worker clock skew does not matter. `model` is any
+    # job table with the lease columns (IngestJob, ReportPack).
+    while True:
+        job = (
+            db.query(model)
+            .filter(
+                or_(
+                    model.status == "queued",
+                    and_(
+                        model.status == "running",
+                        or_(
+                            model.lease_expires_at.is_(None),
+                            model.lease_expires_at < func.now(),
+                        ),
+                    ),
+                )
+            )
+            .order_by(model.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not job:
+            db.commit()
+            return None
+        if job.status == "running":
+            logger.warning(
+                "Requeueing %s %s after lease expiry (worker %s)",
+                model.__tablename__,
+                job.id,
+                job.worker_id,
+            )
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            job.status = "failed"
+            job.error_text = f"Gave up after {job.attempts} attempts"
+            job.worker_id = None
+            job.lease_expires_at = None
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            continue
+        job.status = "running"
+        job.worker_id = worker_id
+        job.attempts += 1
+        job.heartbeat_at = func.now()
+        job.lease_expires_at = func.now() + timedelta(seconds=JOB_LEASE_SECONDS)
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        return job
+
+
+def release_job(
+    db: Session,
+    job,
+    status: str,
+    error_text: str | None = None,
+    worker_id: str = WORKER_ID,
+) -> bool:
+    model = type(job)
+    result = db.execute(
+        update(model)
+        .where(model.id == job.id, model.worker_id == worker_id)
+        .values(
+            status=status,
+            error_text=error_text,
+            lease_expires_at=None,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+class LeaseHeartbeat:
+    def __init__(
+        self,
+        job_id,
+        worker_id: str = WORKER_ID,
+        interval: float = JOB_HEARTBEAT_INTERVAL,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        model=IngestJob,
+    ) -> None:
+        self.job_id = job_id
+        self.model = model
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, name=f"lease-{job_id}", daemon=True
+        )
+
+    def __enter__(self) -> LeaseHeartbeat:
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def check(self) -> None:
+        if self.lost:
+            raise LeaseLost(f"Lease on {self.model.__tablename__} {self.job_id} was lost")
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                with SessionLocal() as db:
+                    result = db.execute(
+                        update(self.model)
+                        .where(
+                            self.model.id == self.job_id,
+                            self.model.worker_id == self.worker_id,
+                            self.model.status == "running",
+                        )
+                        .values(
+                            heartbeat_at=func.now(),
+                            lease_expires_at=func.now() + timedelta(seconds=self.lease_seconds),
+                        )
+                    )
+                    db.commit()
+            except Exception:  # noqa: BLE001
+                logger.exception(
+                    "Heartbeat failed for %s %s", self.model.__tablename__, self.job_id
+                )
+                continue
+            if result.rowcount == 0:
+                logger.error("Lost lease on %s %s", self.model.__tablename__, self.job_id)
+                self.lost = True
+                return
+
+
+class JobNotifications:
+    def __init__(self, channel: str = JOB_NOTIFY_CHANNEL) -> None:
+        self.channel = channel
+        self.connection: psycopg.Connection | None = None
+        # LISTEN before the worker's first claim: a job NOTIFYed between an
+        # empty claim and the LISTEN would otherwise wait a full timeout.
+        self.listen()
+
+    def listen(self) -> bool:
+        try:
+            self.connection = psycopg.connect(LIBPQ_URL, autocommit=True)
+            self.connection.execute(f'LISTEN "{self.channel}"')
+            return True
+        except psycopg.Error:
+            logger.exception("Job notification listener failed; falling back to polling")
+            self.close()
+            return False
+
+    def wait(self, timeout: float = JOB_WAIT_TIMEOUT) -> bool:
+        # Blocks until the API NOTIFYs a new job or the timeout passes; the
+        # timeout doubles as the fallback poll that picks up expired leases
+        # and anything queued while the listener was disconnected.
+        try:
+            if self.connection is None or self.connection.closed:
+                # Notifications sent while disconnected are lost, so return
+                # straight away and let the caller claim again once listening.
+                if self.listen():
+                    return True
+                time.sleep(timeout)
+                return False
+            for _ in self.connection.notifies(timeout=timeout, stop_after=1):
+                return True
+            return False
+        except psycopg.Error:
+            logger.exception("Job notification listener failed; falling back to polling")
+            self.close()
+            time.sleep(timeout)
+            return False
+
+    def close(self) -> None:
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except psycopg.Error:
+                pass
+        self.connection = None
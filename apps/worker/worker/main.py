@@ -1,23 +1,23 @@
 from __future__ import annotations
 
 import logging
-import time
 
 from .db import SessionLocal
 from .ingest import IngestRunner
-
-
-POLL_INTERVAL = 2
+from .job_queue import JobNotifications
+from .partitions import start_partition_scheduler
+from .report_packs import ReportPackRunner
 
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    start_partition_scheduler(SessionLocal)
+    notifications = JobNotifications()
     while True:
         with SessionLocal() as db:
-            runner = IngestRunner(db)
-            ran = runner.run_next_job()
+            ran = IngestRunner(db).run_next_job() or ReportPackRunner(db).run_next_job()
         if not ran:
-            time.sleep(POLL_INTERVAL)
+            notifications.wait()
 
 
 if __name__ == "__main__":
@@ -26,6 +26,8 @@ class SourceFile(Base):
     name: Mapped[str] = mapped_column(String(255))
     size: Mapped[int] = mapped_column(Integer)
     uri: Mapped[str] = mapped_column(String(500))
+    # NULL for files hashed as a plain SHA-256 before leaf hashing.
+    hash_scheme: Mapped[str | None] = mapped_column(String(40))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
@@ -53,7 +55,12 @@ class IngestJob(Base):
     status: Mapped[str] = mapped_column(String(40), default="queued")
     progress_json: Mapped[dict | None] = mapped_column(JSON, default=dict)
     stats_json: Mapped[dict | None] = mapped_column(JSON, default=dict)
+    options_json: Mapped[dict | None] = mapped_column(JSON, default=dict)
     error_text: Mapped[str | None] = mapped_column(Text)
+    worker_id: Mapped[str | None] = mapped_column(String(100))
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
@@ -64,11 +71,30 @@ class RawBlock(Base):
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     source_file_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("source_file.id"))
     uri: Mapped[str] = mapped_column(String(500))
+    byte_offset: Mapped[int | None] = mapped_column(BigInteger)
+    byte_length: Mapped[int | None] = mapped_column(BigInteger)
     codec: Mapped[str] = mapped_column(String(20), default="zstd")
+    dictionary_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("zstd_dictionary.id")
+    )
     line_count: Mapped[int] = mapped_column(Integer)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
 
 
+class ZstdDictionary(Base):
+    __tablename__ = "zstd_dictionary"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    source_file_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("source_file.id")
+    )
+    dict_id: Mapped[int] = mapped_column(BigInteger)
+    uri: Mapped[str] = mapped_column(String(500))
+    size: Mapped[int] = mapped_column(Integer)
+    sample_count: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
 class DictEventType(Base):
     __tablename__ = "dict_event_type"
 
@@ -138,4 +164,36 @@ class UnknownSignature(Base):
     ingest_job_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("ingest_job.id"))
     signature: Mapped[str] = mapped_column(String(400))
     count: Mapped[int] = mapped_column(Integer, default=1)
+    examples: Mapped[list | None] = mapped_column(JSON, default=list)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class BlockFingerprint(Base):
+    __tablename__ = "block_fingerprint"
+
+    fingerprint: Mapped[str] = mapped_column(String(32), primary_key=True)
+    source_file_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("source_file.id"), primary_key=True
+    )
+    ingest_job_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("ingest_job.id"))
+    size: Mapped[int] = mapped_column(Integer)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class ReportPack(Base):
+    __tablename__ = "report_pack"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name: Mapped[str] = mapped_column(String(200))
+    filter_json: Mapped[dict | None] = mapped_column(JSON, default=dict)
+    uri: Mapped[str | None] = mapped_column(String(500))
+    status: Mapped[str] = mapped_column(String(40), default="queued")
+    progress_json: Mapped[dict | None] = mapped_column(JSON, default=dict)
+    error_text: Mapped[str | None] = mapped_column(Text)
+    size: Mapped[int | None] = mapped_column(BigInteger)
+    worker_id: Mapped[str | None] = mapped_column(String(100))
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Iterator
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Iterator
 from zoneinfo import ZoneInfo
 
 from dateutil import parser as date_parser
@@ -35,7 +36,7 @@ KNOWN_TITLES = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class BlockState:
     occurred_at: datetime | None
     occurred_at_quality: str
@@ -44,10 +45,16 @@ class BlockState:
 
 
 def normalize_lines(
-    lines: Iterator[tuple[str, str, int, int]], job_date: datetime, date_order: str = "DMY"
+    lines: Iterator[tuple[str, str, int, int]],
+    job_date: datetime,
+    date_order: str = "DMY",
+    last_absolute: datetime | None = None,
+    on_block_start: Callable[[int, datetime | None], None] | None = None,
 ):
+    # on_block_start(global_line_no, last_absolute) fires for every timestamp
+    # line before it is parsed: everything before that line has been yielded,
+    # so it is a point normalization can restart from with just last_absolute.
     state = BlockState(occurred_at=None, occurred_at_quality="UNKNOWN", title=None, payload=[])
-    last_absolute: datetime | None = None
 
     def flush_state():
         nonlocal state
@@ -71,6 +78,8 @@ def normalize_lines(
         if timestamp_match:
             for block in flush_state():
                 yield block
+            if on_block_start:
+                on_block_start(global_line_no, last_absolute)
             ts_text = timestamp_match.group("ts").strip()
             occurred_at, quality, last_absolute = parse_timestamp(
                 ts_text, last_absolute, job_date, date_order
@@ -104,36 +113,90 @@ def parse_timestamp(
     job_date: datetime,
     date_order: str,
 ) -> tuple[datetime | None, str, datetime | None]:
-    ts_text = ts_text.replace("at ", "")
-    ts_lower = ts_text.lower()
+    ts_text = ts_text.strip()
     anchor = last_absolute or job_date
-    if re.match(r"^\\d{1,2}:\\d{2}(\\s*[APap][Mm])?$", ts_text.strip()):
-        dt = _parse_time_only(ts_text, anchor.date())
-        return dt, "TIME_ONLY", last_absolute
-    if "yesterday" in ts_lower:
-        base = (anchor - timedelta(days=1)).date()
-        time_part = ts_text.split("at")[-1].strip()
-        dt = _parse_time_only(time_part, base)
-        return dt, "RELATIVE", last_absolute
-    if "today" in ts_lower:
+    clock = _clock(ts_text)
+    if clock:
+        return _at(anchor.date(), clock), "TIME_ONLY", last_absolute
+    relative = RELATIVE_TS.match(ts_text)
+    if relative:
         base = anchor.date()
-        time_part = ts_text.split("at")[-1].strip()
-        dt = _parse_time_only(time_part, base)
-        return dt, "RELATIVE", last_absolute
-    try:
-        dt = date_parser.parse(ts_text, dayfirst=(date_order == "DMY"))
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=TIMEZONE)
-        last_absolute = dt
-        return dt, "ABSOLUTE", last_absolute
-    except (ValueError, TypeError):
+        if relative.group("day").lower() == "yesterday":
+            base -= timedelta(days=1)
+        clock = _clock(relative.group("time"), fallback=True)
+        if clock is None:
+            return None, "UNKNOWN", last_absolute
+        return _at(base, clock), "RELATIVE", last_absolute
+    dt = _absolute(ts_text, date_order == "DMY")
+    if dt is None:
         return None, "UNKNOWN", last_absolute
+    return dt, "ABSOLUTE", dt
+
+
+# Discord only renders a few timestamp shapes, so they are matched with
+# fixed regexes and built with plain integer arithmetic; dateutil is left
+# for anything else. Consecutive embeds mostly share a minute, so results
+# are memoized per timestamp text.
+ABSOLUTE_TS = re.compile(
+    r"^(\d{1,2})[/.](\d{1,2})[/.](\d{4}),?\s+"
+    r"(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([APap][Mm])?$"
+)
+TIME_ONLY_TS = re.compile(r"^(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([APap][Mm])?$")
+RELATIVE_TS = re.compile(r"^(?P<day>today|yesterday)\s+(?:at\s+)?(?P<time>.+)$", re.IGNORECASE)
+TIMESTAMP_CACHE_SIZE = 4096
+
+
+def _hour(hour: int, meridiem: str | None) -> int | None:
+    if not meridiem:
+        return hour if hour < 24 else None
+    if not 1 <= hour <= 12:
+        return None
+    return hour % 12 + (12 if meridiem in "Pp" else 0)
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _clock(text: str, fallback: bool = False) -> tuple[int, int, int] | None:
+    match = TIME_ONLY_TS.match(text)
+    if match:
+        hour = _hour(int(match.group(1)), match.group(4) and match.group(4)[0])
+        minute, second = int(match.group(2)), int(match.group(3) or 0)
+        if hour is not None and minute < 60 and second < 60:
+            return hour, minute, second
+    if not fallback:
+        return None
+    try:
+        parsed = date_parser.parse(text)
+    except (ValueError, OverflowError):
+        return None
+    return parsed.hour, parsed.minute, parsed.second
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _absolute(text: str, dayfirst: bool) -> datetime | None:
+    match = ABSOLUTE_TS.match(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        day, month = (first, second) if dayfirst else (second, first)
+        if month > 12 and day <= 12:
+            # Same rescue as dateutil: the order is wrong for this date.
+            day, month = month, day
+        meridiem = match.group(7)
+        hour = _hour(int(match.group(4)), meridiem and meridiem[0])
+        minute, second = int(match.group(5)), int(match.group(6) or 0)
+        if hour is not None:
+            try:
+                return datetime(year, month, day, hour, minute, second, tzinfo=TIMEZONE)
+            except ValueError:
+                pass
+    try:
+        dt = date_parser.parse(text.replace("at ", ""), dayfirst=dayfirst)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=TIMEZONE)
 
 
-def _parse_time_only(time_part: str, base_date):
-    dt = date_parser.parse(time_part)
-    dt = datetime.combine(base_date, dt.time()).replace(tzinfo=TIMEZONE)
-    return dt
+def _at(base_date: date, clock: tuple[int, int, int]) -> datetime:
+    return datetime(base_date.year, base_date.month, base_date.day, *clock, tzinfo=TIMEZONE)
 
 
 def clean_payload_line(line: str) -> str:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import uuid
 from pathlib import Path
 
 OBJECT_STORE_PATH = Path(os.getenv("OBJECT_STORE_PATH", "/data/object-store"))
@@ -10,10 +11,59 @@ class LocalObjectStore:
     def __init__(self) -> None:
         OBJECT_STORE_PATH.mkdir(parents=True, exist_ok=True)
 
-    def raw_block_path(self, source_file_id: str, block_id: str) -> Path:
-        target = OBJECT_STORE_PATH / "raw-blocks" / str(source_file_id) / f"{block_id}.zst"
+    def segment_path(self, source_file_id: str, segment_id: str) -> Path:
+        target = OBJECT_STORE_PATH / "raw-segments" / str(source_file_id) / f"{segment_id}.seg"
         target.parent.mkdir(parents=True, exist_ok=True)
         return target
 
+    def dictionary_path(self, dictionary_id: str) -> Path:
+        target = OBJECT_STORE_PATH / "zstd-dictionaries" / f"{dictionary_id}.zdict"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def report_pack_path(self, name: str) -> Path:
+        target = OBJECT_STORE_PATH / "report-packs" / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def read_raw_block(self, uri: str, offset: int | None = None, length: int | None = None) -> bytes:
+        with Path(uri).open("rb") as handle:
+            if offset is None or length is None:
+                return handle.read()
+            return os.pread(handle.fileno(), length, offset)
+
+
+class SegmentFile:
+    # Append-only file of concatenated zstd frames. Each raw block is one
+    # frame addressed by (uri, byte_offset, byte_length), so a 5GB transcript
+    # becomes a handful of files instead of tens of thousands.
+    def __init__(self, source_file_id: str, max_bytes: int) -> None:
+        self.source_file_id = source_file_id
+        self.max_bytes = max_bytes
+        self.path: Path | None = None
+        self.handle = None
+        self.size = 0
+
+    def append(self, data: bytes) -> tuple[str, int, int]:
+        if self.handle is None or (self.size and self.size + len(data) > self.max_bytes):
+            self._rotate()
+        offset = self.size
+        self.handle.write(data)
+        # Readers (the API) pread frames as soon as the RawBlock row commits.
+        self.handle.flush()
+        self.size += len(data)
+        return str(self.path), offset, len(data)
+
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+        self.handle = None
+
+    def _rotate(self) -> None:
+        self.close()
+        self.path = object_store.segment_path(self.source_file_id, uuid.uuid4())
+        self.handle = self.path.open("ab")
+        self.size = 0
+
 
 object_store = LocalObjectStore()
@@ -18,3 +18,28 @@ PARSERS: list[Parser] = [
     AdminParser(),
     JewelryParser(),
 ]
+
+
+def _dispatch_table(parsers: list[Parser]) -> tuple[dict[str, list[Parser]], list[Parser]]:
+    by_title: dict[str, list[Parser]] = {}
+    fallback: list[Parser] = []
+    for parser in parsers:
+        if not parser.titles:
+            fallback.append(parser)
+        for title in parser.titles:
+            by_title.setdefault(title, []).append(parser)
+    return by_title, fallback
+
+
+# Built once at import. Titles come out of the normalizer already stripped,
+# so dispatch is a single dict lookup per block.
+PARSERS_BY_TITLE, FALLBACK_PARSERS = _dispatch_table(PARSERS)
+
+
+def parsers_for(block: NormalizedBlock) -> list[Parser]:
+    # Titled parsers keep their PARSERS order; fallback parsers still decide
+    # for themselves through match().
+    titled = PARSERS_BY_TITLE.get(block.title, []) if block.title else []
+    if not FALLBACK_PARSERS:
+        return titled
+    return [*titled, *(parser for parser in FALLBACK_PARSERS if parser.match(block))]
@@ -4,6 +4,7 @@ import re
 from typing import Iterable
 
 from .base import Parser, NormalizedBlock, EventData
+from .lines import LineClassifier, LineRule
 from .utils import parse_int_value
 
 GIVE_MONEY = re.compile(
@@ -12,19 +13,22 @@ GIVE_MONEY = re.compile(
 GIVE_ITEM = re.compile(
     r"(?P<staff>.+?)\[(?P<staff_id>\d+)\] i-a dat lui (?P<target>.+?)\[(?P<target_id>\d+)\] item-ul (?P<item>.+?)\(x(?P<qty>[\d.,]+)\)"
 )
+LINES = LineClassifier(
+    LineRule("money", "] suma de ", GIVE_MONEY),
+    LineRule("item", "] item-ul ", GIVE_ITEM),
+)
 
 
 class AdminParser(Parser):
     parser_id = "admin"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() in {"Give Money (K-Menu)", "Give Item (K-Menu)"}
+    titles = frozenset({"Give Money (K-Menu)", "Give Item (K-Menu)"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         for payload in block.payload:
-            line = payload.text
-            if match := GIVE_MONEY.search(line):
+            kind, match = LINES.classify(payload.text)
+            if kind == "money":
                 yield EventData(
                     event_type="ADMIN_GIVE_MONEY",
                     src_player_id=match.group("staff_id"),
@@ -35,7 +39,7 @@ class AdminParser(Parser):
                     raw_line_index=payload.raw_line_index,
                     global_line_no=payload.global_line_no,
                 )
-            elif match := GIVE_ITEM.search(line):
+            elif kind == "item":
                 yield EventData(
                     event_type="ADMIN_GIVE_ITEM",
                     src_player_id=match.group("staff_id"),
@@ -4,6 +4,7 @@ import re
 from typing import Iterable
 
 from .base import Parser, NormalizedBlock, EventData
+from .lines import LineClassifier, LineRule
 from .utils import parse_int_value
 
 WITHDRAW = re.compile(r"(?P<name>.+?)\[(?P<id>\d+)\] a retras (?P<amount>[\d.,]+)\$")
@@ -11,23 +12,23 @@ DEPOSIT = re.compile(r"(?P<name>.+?)\[(?P<id>\d+)\] a depozitat (?P<amount>[\d.,
 TRANSFER = re.compile(
     r"(?P<src>.+?)\[(?P<src_id>\d+)\] a transferat (?P<amount>[\d.,]+)\$ lui (?P<dst>.+?)\[(?P<dst_id>\d+)\]\.?"
 )
+LINES = LineClassifier(
+    LineRule("withdraw", "] a retras ", WITHDRAW),
+    LineRule("deposit", "] a depozitat ", DEPOSIT),
+    LineRule("transfer", "] a transferat ", TRANSFER),
+)
 
 
 class BankParser(Parser):
     parser_id = "bank"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() in {
-            "Retragere Banca",
-            "Depunere Banca",
-            "Transfer (Bancar)",
-        }
+    titles = frozenset({"Retragere Banca", "Depunere Banca", "Transfer (Bancar)"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         for payload in block.payload:
-            line = payload.text
-            if match := WITHDRAW.search(line):
+            kind, match = LINES.classify(payload.text)
+            if kind == "withdraw":
                 yield EventData(
                     event_type="BANK_WITHDRAW",
                     src_player_id=match.group("id"),
@@ -36,7 +37,7 @@ class BankParser(Parser):
                     raw_line_index=payload.raw_line_index,
                     global_line_no=payload.global_line_no,
                 )
-            elif match := DEPOSIT.search(line):
+            elif kind == "deposit":
                 yield EventData(
                     event_type="BANK_DEPOSIT",
                     src_player_id=match.group("id"),
@@ -45,7 +46,7 @@ class BankParser(Parser):
                     raw_line_index=payload.raw_line_index,
                     global_line_no=payload.global_line_no,
                 )
-            elif match := TRANSFER.search(line):
+            elif kind == "transfer":
                 yield EventData(
                     event_type="BANK_TRANSFER",
                     src_player_id=match.group("src_id"),
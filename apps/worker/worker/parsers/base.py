@@ -1,18 +1,23 @@
 from __future__ import annotations
 
+import uuid
 from dataclasses import dataclass
 from typing import Iterable
 
+# One of each of these is made per transcript line or event, so they are
+# slotted, and every line of a raw block shares the writer's block UUID
+# instead of carrying its own string copy.
 
-@dataclass
+
+@dataclass(slots=True)
 class PayloadLine:
     text: str
-    raw_block_id: str
+    raw_block_id: uuid.UUID
     raw_line_index: int
     global_line_no: int
 
 
-@dataclass
+@dataclass(slots=True)
 class NormalizedBlock:
     title: str | None
     occurred_at: object | None
@@ -20,7 +25,7 @@ class NormalizedBlock:
     payload: list[PayloadLine]
 
 
-@dataclass
+@dataclass(slots=True)
 class EventData:
     event_type: str
     src_player_id: str | None = None
@@ -30,7 +35,7 @@ class EventData:
     money: int | None = None
     qty: int | None = None
     metadata: dict | None = None
-    raw_block_id: str | None = None
+    raw_block_id: uuid.UUID | None = None
     raw_line_index: int | None = None
     global_line_no: int | None = None
 
@@ -38,9 +43,13 @@ class EventData:
 class Parser:
     parser_id = "base"
     version = "v1"
+    # Block titles this parser handles; the registry dispatches on them
+    # directly. Parsers that need to look past the title leave this empty
+    # and override match().
+    titles: frozenset[str] = frozenset()
 
     def match(self, block: NormalizedBlock) -> bool:
-        raise NotImplementedError
+        return block.title in self.titles
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         raise NotImplementedError
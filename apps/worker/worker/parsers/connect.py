@@ -4,22 +4,27 @@ import re
 from typing import Iterable
 
 from .base import Parser, NormalizedBlock, EventData
+from .lines import LineClassifier, LineRule
 
 CONNECT = re.compile(r"(?P<name>.+?)\[(?P<id>\d+)\] se conectează cu succes \| \(ip: (?P<ip>.+?)\)")
 DISCONNECT = re.compile(r"(?P<name>.+?)\[(?P<id>\d+)\] s-a deconectat (?P<rest>.+)")
+LINES = LineClassifier(
+    LineRule("connect", "] se conectează cu succes | (ip: ", CONNECT),
+    LineRule("disconnect", "] s-a deconectat ", DISCONNECT),
+)
 
 
 class ConnectParser(Parser):
     parser_id = "connect"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() in {"Server Connect", "Server Disconnect"}
+    titles = frozenset({"Server Connect", "Server Disconnect"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         for payload in block.payload:
             line = payload.text
-            if match := CONNECT.search(line):
+            kind, match = LINES.classify(line)
+            if kind == "connect":
                 yield EventData(
                     event_type="CONNECT",
                     src_player_id=match.group("id"),
@@ -28,7 +33,7 @@ class ConnectParser(Parser):
                     raw_line_index=payload.raw_line_index,
                     global_line_no=payload.global_line_no,
                 )
-            elif match := DISCONNECT.search(line):
+            elif kind == "disconnect":
                 event_type = "DISCONNECT"
                 metadata = {"reason_raw": match.group("rest")}
                 if "banat" in line.lower():
@@ -4,6 +4,7 @@ import re
 from typing import Iterable
 
 from .base import Parser, NormalizedBlock, EventData
+from .lines import LineClassifier, LineRule
 from .utils import parse_int_value
 
 PUT = re.compile(
@@ -15,19 +16,23 @@ TAKE = re.compile(
 SEARCH = re.compile(
     r"\[PERCHEZITIE\] Jucatorul (?P<name>.+?)\[(?P<sid>\d+)\] a scos din (?P<target>.+?) item-ul (?P<item>.+?)\(x(?P<qty>[\d.,]+)\)\."
 )
+LINES = LineClassifier(
+    LineRule("put", "[TRANSFER]", PUT, prefix="[TRANSFER]"),
+    LineRule("take", "[REMOVE]", TAKE, prefix="[REMOVE]"),
+    LineRule("search", "[PERCHEZITIE]", SEARCH, prefix="[PERCHEZITIE] Jucatorul "),
+)
 
 
 class ContainerParser(Parser):
     parser_id = "container"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() == "Transfera Item"
+    titles = frozenset({"Transfera Item"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         for payload in block.payload:
-            line = payload.text
-            if match := PUT.search(line):
+            kind, match = LINES.classify(payload.text)
+            if kind == "put":
                 yield EventData(
                     event_type="CONTAINER_PUT",
                     src_player_id=match.group("id"),
@@ -38,7 +43,7 @@ class ContainerParser(Parser):
                     raw_line_index=payload.raw_line_index,
                     global_line_no=payload.global_line_no,
                 )
-            elif match := TAKE.search(line):
+            elif kind == "take":
                 yield EventData(
                     event_type="CONTAINER_TAKE",
                     src_player_id=match.group("id"),
@@ -49,7 +54,7 @@ class ContainerParser(Parser):
                     raw_line_index=payload.raw_line_index,
                     global_line_no=payload.global_line_no,
                 )
-            elif match := SEARCH.search(line):
+            elif kind == "search":
                 yield EventData(
                     event_type="SEARCH_TAKE",
                     src_player_id=match.group("sid"),
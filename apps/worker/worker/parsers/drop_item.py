@@ -15,8 +15,7 @@ class DropItemParser(Parser):
     parser_id = "drop-item"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() == "⚠️ Obiect aruncat pe jos"
+    titles = frozenset({"⚠️ Obiect aruncat pe jos"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         for payload in block.payload:
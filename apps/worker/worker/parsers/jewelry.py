@@ -15,8 +15,7 @@ class JewelryParser(Parser):
     parser_id = "jewelry"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() == "💎 Bijuterii"
+    titles = frozenset({"💎 Bijuterii"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         for payload in block.payload:
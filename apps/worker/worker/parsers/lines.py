@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class LineRule:
+    kind: str
+    # Fixed text every match of the pattern contains; the pattern only
+    # runs on lines that have it.
+    literal: str
+    pattern: re.Pattern
+    # Text every match starts with. The search then starts at its first
+    # occurrence instead of at every position of the line. Without one the
+    # pattern must open with a lazy group (`(?P<name>.+?)...`), whose
+    # leftmost match always starts at 0, so it is tried there only.
+    prefix: str | None = None
+
+
+class LineClassifier:
+    # Returns the first rule, in order, whose pattern matches the line,
+    # exactly as trying each pattern.search() in turn would, but a pattern
+    # is only run when its literal is present, which is usually at most one
+    # rule per line, and never from more than one start position.
+    def __init__(self, *rules: LineRule) -> None:
+        self.rules = rules
+
+    def classify(self, line: str) -> tuple[str | None, re.Match | None]:
+        for rule in self.rules:
+            if rule.literal not in line:
+                continue
+            if rule.prefix is None:
+                match = rule.pattern.match(line)
+            else:
+                start = line.find(rule.prefix)
+                match = rule.pattern.search(line, start) if start >= 0 else None
+            if match:
+                return rule.kind, match
+        return None, None
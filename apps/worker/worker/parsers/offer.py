@@ -4,6 +4,7 @@ import re
 from typing import Iterable
 
 from .base import Parser, NormalizedBlock, EventData
+from .lines import LineClassifier, LineRule
 from .utils import parse_int_value
 
 MONEY = re.compile(
@@ -12,19 +13,22 @@ MONEY = re.compile(
 ITEM = re.compile(
     r"Jucatorul (?P<src>.+?)\[(?P<src_id>\d+)\] i-a oferit lui (?P<dst>.+?)\[(?P<dst_id>\d+)\] - (?P<item>.+?)\(x(?P<qty>[\d.,]+)\)\."
 )
+LINES = LineClassifier(
+    LineRule("money", "] suma de ", MONEY, prefix="Jucatorul "),
+    LineRule("item", "] - ", ITEM, prefix="Jucatorul "),
+)
 
 
 class OfferParser(Parser):
     parser_id = "offer"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() in {"Ofera Bani", "Ofera Item"}
+    titles = frozenset({"Ofera Bani", "Ofera Item"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         for payload in block.payload:
-            line = payload.text
-            if match := MONEY.search(line):
+            kind, match = LINES.classify(payload.text)
+            if kind == "money":
                 yield EventData(
                     event_type="OFFER_MONEY",
                     src_player_id=match.group("src_id"),
@@ -34,7 +38,7 @@ class OfferParser(Parser):
                     raw_line_index=payload.raw_line_index,
                     global_line_no=payload.global_line_no,
                 )
-            elif match := ITEM.search(line):
+            elif kind == "item":
                 item = match.group("item").strip()
                 metadata = {}
                 if item.lower() == "nil":
@@ -15,8 +15,7 @@ class PhoneParser(Parser):
     parser_id = "phone"
     version = "v1"
 
-    def match(self, block: NormalizedBlock) -> bool:
-        return (block.title or "").strip() == "💵 Telefon"
+    titles = frozenset({"💵 Telefon"})
 
     def parse(self, block: NormalizedBlock) -> Iterable[EventData]:
         debits: list[tuple[str, int, str, int, int]] = []
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from .config import PARTITION_MAINTENANCE_INTERVAL, PARTITION_MONTHS_AHEAD
+from .normalizer import TIMESTAMP_STYLE_A, TIMESTAMP_STYLE_B, parse_timestamp
+
+PRESCAN_CACHE_LIMIT = 100_000
+
+
+def partition_name(year: int, month: int) -> str:
+    return f"event_{year:04d}_{month:02d}"
+
+
+def _next_month(year: int, month: int) -> tuple[int, int]:
+    if month == 12:
+        return year + 1, 1
+    return year, month + 1
+
+
+class PartitionManager:
+    def __init__(self) -> None:
+        self.known: set[str] = set()
+        self.failed: set[str] = set()
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger("phx.worker.partitions")
+
+    def load(self, db: Session) -> None:
+        rows = db.execute(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = 'event'
+                """
+            )
+        ).scalars()
+        with self.lock:
+            self.known.update(rows)
+            self.loaded = True
+
+    def ensure_for(self, db: Session, values: Iterable[datetime | None]) -> None:
+        self.ensure_months(db, {(value.year, value.month) for value in values if value is not None})
+
+    def ensure_months(self, db: Session, months: Iterable[tuple[int, int]]) -> None:
+        if not self.loaded:
+            self.load(db)
+        for year, month in sorted(set(months)):
+            name = partition_name(year, month)
+            with self.lock:
+                if name in self.known or name in self.failed:
+                    continue
+            self._create(db, year, month)
+
+    def ensure_future(self, db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD) -> None:
+        now = datetime.utcnow()
+        year, month = now.year, now.month
+        months = []
+        for _ in range(months_ahead + 1):
+            months.append((year, month))
+            year, month = _next_month(year, month)
+        self.ensure_months(db, months)
+
+    def _create(self, db: Session, year: int, month: int) -> None:
+        name = partition_name(year, month)
+        month_start = datetime(year, month, 1)
+        month_end = datetime(*_next_month(year, month), 1)
+        # DDL runs in its own transaction so the job's open batch is untouched;
+        # the advisory lock serializes workers racing on the same month.
+        try:
+            with db.get_bind().begin() as conn:
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+                exists = conn.execute(
+                    text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}
+                ).scalar()
+                if not exists:
+                    conn.execute(
+                        text(
+                            f"CREATE TABLE {name} PARTITION OF event "
+                            f"FOR VALUES FROM ('{month_start.isoformat()}') TO ('{month_end.isoformat()}')"
+                        )
+                    )
+                    conn.execute(text(f"CREATE UNIQUE INDEX {name}_dedupe_key_uq ON {name} (dedupe_key)"))
+                    conn.execute(
+                        text(f"CREATE INDEX {name}_job_time_idx ON {name} (ingest_job_id, occurred_at)")
+                    )
+                    conn.execute(
+                        text(f"CREATE INDEX {name}_job_type_idx ON {name} (ingest_job_id, event_type_id)")
+                    )
+                    self.logger.info("Created partition %s", name)
+        except DBAPIError:
+            # Typically the default partition already holds rows for this
+            # month; those events keep landing in event_notime.
+            self.logger.exception("Could not create partition %s", name)
+            with self.lock:
+                self.failed.add(name)
+            return
+        with self.lock:
+            self.known.add(name)
+
+
+def prescan_months(
+    path: str | Path, job_date: datetime, date_order: str = "DMY"
+) -> set[tuple[int, int]]:
+    months: set[tuple[int, int]] = set()
+    parsed: dict[tuple[str, object], tuple[datetime | None, str]] = {}
+    last_absolute: datetime | None = None
+    with Path(path).open("r", encoding="utf-8", errors="replace") as handle:
+        for raw_line in handle:
+            line = raw_line.strip()
+            match = TIMESTAMP_STYLE_A.match(line) or TIMESTAMP_STYLE_B.match(line)
+            if not match:
+                continue
+            ts_text = match.group("ts").strip()
+            key = (ts_text, last_absolute.date() if last_absolute else None)
+            if key not in parsed:
+                if len(parsed) >= PRESCAN_CACHE_LIMIT:
+                    parsed.clear()
+                try:
+                    occurred_at, quality, _ = parse_timestamp(
+                        ts_text, last_absolute, job_date, date_order
+                    )
+                except (ValueError, OverflowError):
+                    occurred_at, quality = None, "UNKNOWN"
+                parsed[key] = (occurred_at, quality)
+            occurred_at, quality = parsed[key]
+            if quality == "ABSOLUTE":
+                last_absolute = occurred_at
+            if occurred_at is not None:
+                months.add((occurred_at.year, occurred_at.month))
+    return months
+
+
+def start_partition_scheduler(
+    session_factory: Callable[[], Session],
+    interval: float = PARTITION_MAINTENANCE_INTERVAL,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+) -> threading.Thread:
+    logger = logging.getLogger("phx.worker.partitions")
+
+    def run() -> None:
+        while True:
+            try:
+                with session_factory() as db:
+                    partitions.ensure_future(db, months_ahead)
+            except Exception:  # noqa: BLE001
+                logger.exception("Partition maintenance failed")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="partition-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+partitions = PartitionManager()
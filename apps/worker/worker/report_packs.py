@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import shutil
+import tempfile
+import uuid
+import zipfile
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import func, select, union_all, update
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import Select
+
+from .compression import RawDictionary, compression_pool, decompress_raw_block
+from .config import REPORT_BLOCK_CACHE_SIZE, REPORT_PACK_PROGRESS_INTERVAL, REPORT_PACK_YIELD
+from .db import SessionLocal
+from .dictionaries import LRUCache
+from .event_filters import EventFilters, filter_conditions, player_branches
+from .ingest import load_raw_dictionary
+from .job_queue import LeaseHeartbeat, claim_next_job, release_job
+from .models import DictContainer, DictEventType, DictItem, DictPlayer, Event, RawBlock, ReportPack
+from .object_store import object_store
+
+CSV_HEADER = [
+    "event_id",
+    "occurred_at",
+    "event_type",
+    "src_player_id",
+    "dst_player_id",
+    "item",
+    "container",
+    "money",
+    "qty",
+    "ingest_job_id",
+    "raw_block_id",
+    "raw_line_index",
+]
+EVIDENCE_CONTEXT = 2
+
+
+def _decode_raw_block(
+    uri: str, offset: int | None, length: int | None, dictionary: RawDictionary | None
+) -> list[str]:
+    data = object_store.read_raw_block(uri, offset, length)
+    return decompress_raw_block(data, dictionary).decode("utf-8", errors="replace").splitlines()
+
+
+class RawBlockLines:
+    # Decoded blocks are bounded by count: pack rows come out in
+    # (created_at, id) order, so events sharing a block are close together
+    # and a small window of recently decoded blocks catches nearly all
+    # repeats. prefetch() decodes the distinct blocks of a row window on the
+    # shared compression pool (pread and zstd release the GIL); get() hands
+    # them back in whatever order the rows need them.
+    def __init__(self, db: Session, capacity: int = REPORT_BLOCK_CACHE_SIZE) -> None:
+        self.db = db
+        self.cache = LRUCache(capacity)
+        self.pending: dict[uuid.UUID, Future] = {}
+
+    def prefetch(self, raw_block_ids: Iterable[uuid.UUID]) -> None:
+        wanted = {
+            raw_block_id
+            for raw_block_id in raw_block_ids
+            if raw_block_id not in self.pending and self.cache.get(raw_block_id) is None
+        }
+        if wanted:
+            for row in self._raw_blocks(wanted):
+                self.pending[row.id] = self._submit(row)
+
+    def get(self, raw_block_id: uuid.UUID) -> list[str]:
+        lines = self.cache.get(raw_block_id)
+        if lines is None:
+            future = self.pending.pop(raw_block_id, None)
+            if future is None:
+                # Evicted between prefetch and use, or never prefetched.
+                rows = self._raw_blocks([raw_block_id])
+                future = self._submit(rows[0]) if rows else None
+            lines = future.result() if future is not None else []
+            self.cache.put(raw_block_id, lines)
+        return lines
+
+    def _submit(self, row) -> Future:
+        dictionary = load_raw_dictionary(self.db, row.dictionary_id) if row.dictionary_id else None
+        return compression_pool().submit(
+            _decode_raw_block, row.uri, row.byte_offset, row.byte_length, dictionary
+        )
+
+    def _raw_blocks(self, raw_block_ids: Iterable[uuid.UUID]) -> list:
+        # Plain column rows so RawBlock objects do not pile up in the session
+        # identity map over a long pack.
+        return self.db.execute(
+            select(
+                RawBlock.id,
+                RawBlock.uri,
+                RawBlock.byte_offset,
+                RawBlock.byte_length,
+                RawBlock.dictionary_id,
+            ).where(RawBlock.id.in_(list(raw_block_ids)))
+        ).all()
+
+
+def _lookup_id(db: Session, column, value: str) -> int | None:
+    return db.execute(select(column.class_.id).where(column == value)).scalar()
+
+
+def pack_events(db: Session, filters: dict) -> tuple[Select, Select] | None:
+    # The same filters as GET /events (event_filters is shared with the API).
+    # Returns (rows, count) statements, or None when a filter value is unknown.
+    matched_filters = filter_conditions(
+        EventFilters.from_json(filters), lambda column, value: _lookup_id(db, column, value)
+    )
+    if matched_filters is None:
+        return None
+    conditions, player_id = matched_filters
+
+    if player_id is not None:
+        matched = union_all(*player_branches(conditions, player_id)).subquery("player_events")
+        event = aliased(Event, matched)
+        count = select(func.count()).select_from(matched)
+    else:
+        event = Event
+        count = select(func.count()).select_from(Event).where(*conditions)
+
+    src_player = aliased(DictPlayer)
+    dst_player = aliased(DictPlayer)
+    rows = (
+        select(
+            event.id,
+            event.occurred_at,
+            DictEventType.key.label("event_type"),
+            src_player.player_id.label("src_player_id"),
+            dst_player.player_id.label("dst_player_id"),
+            DictItem.name.label("item"),
+            DictContainer.key.label("container"),
+            event.money,
+            event.qty,
+            event.ingest_job_id,
+            event.raw_block_id,
+            event.raw_line_index,
+        )
+        .join(DictEventType, event.event_type_id == DictEventType.id)
+        .outerjoin(src_player, event.src_player_id == src_player.id)
+        .outerjoin(dst_player, event.dst_player_id == dst_player.id)
+        .outerjoin(DictItem, event.item_id == DictItem.id)
+        .outerjoin(DictContainer, event.container_id == DictContainer.id)
+        .order_by(event.created_at.desc(), event.id.desc())
+    )
+    if event is Event:
+        rows = rows.where(*conditions)
+    return rows, count
+
+
+class ReportPackRunner:
+    def __init__(self, db: Session) -> None:
+        self.db = db
+        self.logger = logging.getLogger("phx.worker.report_packs")
+
+    def run_next_job(self) -> bool:
+        pack = claim_next_job(self.db, model=ReportPack)
+        if not pack:
+            return False
+        self.logger.info("Building report pack %s (attempt %s)", pack.id, pack.attempts)
+        with LeaseHeartbeat(pack.id, model=ReportPack) as lease:
+            try:
+                self._build(pack, lease)
+                status, error_text = "completed", None
+            except Exception as exc:  # noqa: BLE001
+                self.db.rollback()
+                status, error_text = "failed", str(exc)
+                self.logger.exception("Failed report pack %s", pack.id)
+        if not release_job(self.db, pack, status, error_text):
+            self.logger.warning("Report pack %s was taken over by another worker", pack.id)
+        elif status == "completed":
+            self.logger.info("Completed report pack %s", pack.id)
+        return True
+
+    def _build(self, pack: ReportPack, lease: LeaseHeartbeat) -> None:
+        filters = pack.filter_json or {}
+        statements = pack_events(self.db, filters)
+        total = self.db.execute(statements[1]).scalar() if statements else 0
+        self._report_progress(pack.id, {"events_total": total, "events_written": 0})
+
+        target = object_store.report_pack_path(f"{pack.name}-{pack.id}.zip")
+        partial = target.with_name(target.name + ".part")
+        blocks = RawBlockLines(self.db)
+        written = 0
+        # Nothing grows with the pack size: rows stream from a server-side
+        # cursor, CSV goes straight into its zip entry, and evidence is
+        # spooled to a temp file next to the pack (a zip can only have one
+        # entry open for writing at a time).
+        with zipfile.ZipFile(partial, "w", zipfile.ZIP_DEFLATED) as archive, tempfile.TemporaryFile(
+            dir=partial.parent
+        ) as evidence:
+            with archive.open("events.csv", "w", force_zip64=True) as entry:
+                text = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+                writer = csv.writer(text)
+                writer.writerow(CSV_HEADER)
+                if statements:
+                    result = self.db.execute(
+                        statements[0].execution_options(yield_per=REPORT_PACK_YIELD)
+                    )
+                    windows = result.partitions()
+                    window = next(windows, None)
+                    if window:
+                        blocks.prefetch(row.raw_block_id for row in window)
+                    while window:
+                        # Blocks for the next window decode while this one
+                        # is written out in order.
+                        upcoming = next(windows, None)
+                        if upcoming:
+                            blocks.prefetch(row.raw_block_id for row in upcoming)
+                        written = self._write_window(
+                            writer, evidence, blocks, window, written, pack.id, total, lease
+                        )
+                        window = upcoming
+                text.flush()
+                text.detach()
+            evidence.seek(0)
+            with archive.open("evidence.txt", "w", force_zip64=True) as entry:
+                shutil.copyfileobj(evidence, entry, 1024 * 1024)
+            manifest = {
+                "generated_at": datetime.utcnow().isoformat(),
+                "filters": filters,
+                "event_count": written,
+            }
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+        lease.check()
+        partial.replace(target)
+        pack.uri = str(target)
+        pack.size = target.stat().st_size
+        pack.progress_json = {"events_total": total, "events_written": written}
+        self.db.commit()
+
+    def _write_window(
+        self,
+        writer,
+        evidence,
+        blocks: RawBlockLines,
+        window,
+        written: int,
+        pack_id: uuid.UUID,
+        total: int,
+        lease: LeaseHeartbeat,
+    ) -> int:
+        for row in window:
+            writer.writerow(
+                [
+                    str(row.id),
+                    row.occurred_at.isoformat() if row.occurred_at else "",
+                    row.event_type,
+                    row.src_player_id or "",
+                    row.dst_player_id or "",
+                    row.item or "",
+                    row.container or "",
+                    row.money if row.money is not None else "",
+                    row.qty if row.qty is not None else "",
+                    row.ingest_job_id,
+                    str(row.raw_block_id),
+                    row.raw_line_index,
+                ]
+            )
+            self._write_evidence(evidence, blocks, row)
+            written += 1
+            if written % REPORT_PACK_PROGRESS_INTERVAL == 0:
+                lease.check()
+                self._report_progress(pack_id, {"events_total": total, "events_written": written})
+        return written
+
+    def _write_evidence(self, evidence, blocks: RawBlockLines, row) -> None:
+        lines = blocks.get(row.raw_block_id)
+        index = row.raw_line_index
+        if not 0 <= index < len(lines):
+            return
+        context = "\n".join(lines[max(0, index - EVIDENCE_CONTEXT) : index + EVIDENCE_CONTEXT + 1])
+        # Entries are separated by a blank line, as in the synchronous packs.
+        separator = "\n" if evidence.tell() else ""
+        evidence.write(f"{separator}[{row.id}]\n{context}\n".encode("utf-8"))
+
+    def _report_progress(self, pack_id: uuid.UUID, progress: dict) -> None:
+        # Separate session: committing on self.db would close the streaming
+        # cursor the rows come from.
+        with SessionLocal() as db:
+            db.execute(
+                update(ReportPack)
+                .where(ReportPack.id == pack_id)
+                .values(progress_json=progress, updated_at=datetime.utcnow())
+            )
+            db.commit()
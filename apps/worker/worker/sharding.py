@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from .normalizer import TIMESTAMP_STYLE_A, TIMESTAMP_STYLE_B, parse_timestamp
+
+SCAN_WINDOW = 1024 * 1024
+LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+
+@dataclass
+class Shard:
+    index: int
+    start: int
+    end: int
+    line_offset: int
+    last_absolute: datetime | None
+
+    def to_json(self) -> dict:
+        return {
+            "index": self.index,
+            "start": self.start,
+            "end": self.end,
+            "line_offset": self.line_offset,
+            "last_absolute": self.last_absolute.isoformat() if self.last_absolute else None,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> Shard:
+        last_absolute = data.get("last_absolute")
+        return cls(
+            index=data["index"],
+            start=data["start"],
+            end=data["end"],
+            line_offset=data["line_offset"],
+            last_absolute=datetime.fromisoformat(last_absolute) if last_absolute else None,
+        )
+
+
+def iter_line_offsets(
+    path: str | Path, start: int = 0, end: int | None = None
+) -> Iterator[tuple[int, str]]:
+    # Byte-range reader shared by the sequential and sharded paths so both
+    # number lines identically. "\n" never appears inside a UTF-8 sequence,
+    # so decoding line by line is safe. Yields each line with the byte
+    # offset it starts at.
+    #
+    # Lines end at "\r\n", "\n" or a bare "\r", as with the text-mode
+    # reader this replaced, so line numbers (and with them dedupe keys)
+    # match earlier ingests of files with old Mac line endings.
+    with Path(path).open("rb") as handle:
+        handle.seek(start)
+        position = start
+        for raw_line in handle:
+            if end is not None and position >= end:
+                break
+            offset = position
+            position += len(raw_line)
+            if b"\r" not in raw_line:
+                yield offset, raw_line.rstrip(b"\n").decode("utf-8", errors="replace")
+                continue
+            content = raw_line[:-1] if raw_line.endswith(b"\n") else raw_line
+            if content.endswith(b"\r"):
+                content = content[:-1]
+            for part in content.split(b"\r"):
+                yield offset, part.decode("utf-8", errors="replace")
+                offset += len(part) + 1
+
+
+def iter_lines(path: str | Path, start: int = 0, end: int | None = None) -> Iterator[str]:
+    for _, line in iter_line_offsets(path, start, end):
+        yield line
+
+
+def plan_shards(
+    path: str | Path, shard_count: int, job_date: datetime, date_order: str = "DMY"
+) -> list[Shard]:
+    size = Path(path).stat().st_size
+    boundaries = [0]
+    with Path(path).open("rb") as handle:
+        for index in range(1, shard_count):
+            target = max(size * index // shard_count, boundaries[-1] + 1)
+            offset = _next_block_start(handle, target)
+            if offset is None or offset >= size:
+                break
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+        boundaries.append(size)
+
+        shards = []
+        line_offset = 0
+        for index, (start, end) in enumerate(zip(boundaries, boundaries[1:])):
+            last_absolute = (
+                _last_absolute_before(handle, start, job_date, date_order) if start else None
+            )
+            shards.append(
+                Shard(
+                    index=index,
+                    start=start,
+                    end=end,
+                    line_offset=line_offset,
+                    last_absolute=last_absolute,
+                )
+            )
+            line_offset += _count_lines(handle, start, end)
+    return shards
+
+
+def _timestamp_text(raw_line: bytes) -> str | None:
+    line = raw_line.decode("utf-8", errors="replace").strip()
+    match = TIMESTAMP_STYLE_A.match(line) or TIMESTAMP_STYLE_B.match(line)
+    return match.group("ts").strip() if match else None
+
+
+def _next_block_start(handle: BinaryIO, offset: int) -> int | None:
+    # Shards must start on a timestamp line: that is where normalize_lines
+    # closes the previous block, so no block straddles two shards.
+    handle.seek(offset - 1)
+    if handle.read(1) != b"\n":
+        handle.readline()
+    while True:
+        position = handle.tell()
+        raw_line = handle.readline()
+        if not raw_line:
+            return None
+        if _timestamp_text(raw_line) is not None:
+            return position
+
+
+def _count_lines(handle: BinaryIO, start: int, end: int) -> int:
+    # Counts line breaks the way iter_line_offsets splits lines: "\r\n"
+    # once, including when a window boundary falls between the two bytes.
+    handle.seek(start)
+    remaining = end - start
+    count = 0
+    previous = b""
+    while remaining > 0:
+        data = handle.read(min(SCAN_WINDOW, remaining))
+        if not data:
+            break
+        count += data.count(b"\n") + data.count(b"\r") - data.count(b"\r\n")
+        if previous == b"\r" and data[:1] == b"\n":
+            count -= 1
+        previous = data[-1:]
+        remaining -= len(data)
+    # A final line without a trailing line break is still a line.
+    if end > start:
+        handle.seek(end - 1)
+        if handle.read(1) not in (b"\n", b"\r"):
+            count += 1
+    return count
+
+
+def _last_absolute_before(
+    handle: BinaryIO, offset: int, job_date: datetime, date_order: str
+) -> datetime | None:
+    # Relative timestamps ("Today", "Yesterday", bare times) anchor on the
+    # last absolute timestamp, so walk backwards from the split point until
+    # one is found instead of replaying the whole prefix.
+    position = offset
+    carry = b""
+    while position > 0:
+        size = min(SCAN_WINDOW, position)
+        position -= size
+        handle.seek(position)
+        lines = LINE_BREAK.split(handle.read(size) + carry)
+        if position > 0:
+            carry = lines.pop(0)
+        for raw_line in reversed(lines):
+            ts_text = _timestamp_text(raw_line)
+            if ts_text is None:
+                continue
+            try:
+                occurred_at, quality, _ = parse_timestamp(ts_text, None, job_date, date_order)
+            except (ValueError, OverflowError):
+                continue
+            if quality == "ABSOLUTE":
+                return occurred_at
+    return None
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import heapq
+import re
+from dataclasses import dataclass, field
+
+from .config import UNKNOWN_SIGNATURE_CAPACITY, UNKNOWN_SIGNATURE_EXAMPLES
+
+DIGIT_RUN = re.compile(r"\d+")
+
+
+def normalize_signature(text: str) -> str:
+    # Digit runs become <#>, whitespace runs a single space. str.split()
+    # collapses and strips whitespace in one C pass, leaving one regex.
+    return DIGIT_RUN.sub("<#>", " ".join(text.split())).lower()
+
+
+@dataclass(slots=True)
+class SignatureEntry:
+    count: int
+    # Upper bound on how much of count was inherited from the evicted
+    # signature this entry replaced.
+    error: int
+    examples: list[str] = field(default_factory=list)
+
+
+class SignatureSketch:
+    # Space-Saving top-K: at most `capacity` signatures are tracked. A new
+    # signature arriving when full replaces the one with the lowest count
+    # and inherits that count, so every signature seen more than
+    # total / capacity times is guaranteed to be kept, with a count that
+    # overestimates by at most its `error`.
+    #
+    # The min-heap is updated lazily: increments do not touch it, and
+    # stale entries are refreshed when they reach the top at eviction time.
+    def __init__(
+        self,
+        capacity: int = UNKNOWN_SIGNATURE_CAPACITY,
+        examples: int = UNKNOWN_SIGNATURE_EXAMPLES,
+    ) -> None:
+        self.capacity = capacity
+        self.examples = examples
+        self.entries: dict[str, SignatureEntry] = {}
+        self.heap: list[tuple[int, str]] = []
+        self.total = 0
+
+    def add(self, signature: str, line: str, count: int = 1) -> None:
+        self.total += count
+        entry = self.entries.get(signature)
+        if entry is None:
+            inherited = 0
+            if len(self.entries) >= self.capacity:
+                inherited = self._evict()
+            entry = self.entries[signature] = SignatureEntry(inherited, inherited)
+            heapq.heappush(self.heap, (inherited + count, signature))
+        entry.count += count
+        if len(entry.examples) < self.examples:
+            entry.examples.append(line)
+
+    def _evict(self) -> int:
+        while True:
+            count, signature = self.heap[0]
+            current = self.entries[signature].count
+            if current == count:
+                heapq.heappop(self.heap)
+                del self.entries[signature]
+                return count
+            heapq.heapreplace(self.heap, (current, signature))
+
+    def merge(self, other: SignatureSketch) -> None:
+        # Shard sketches are combined by summing counts and keeping the
+        # top `capacity`, which keeps the same error bound.
+        for signature, entry in other.entries.items():
+            mine = self.entries.get(signature)
+            if mine is None:
+                self.entries[signature] = SignatureEntry(entry.count, entry.error, list(entry.examples))
+            else:
+                mine.count += entry.count
+                mine.error += entry.error
+                mine.examples.extend(entry.examples[: self.examples - len(mine.examples)])
+        self.total += other.total
+        if len(self.entries) > self.capacity:
+            keep = heapq.nlargest(self.capacity, self.entries.items(), key=lambda item: item[1].count)
+            self.entries = dict(keep)
+        self.heap = [(entry.count, signature) for signature, entry in self.entries.items()]
+        heapq.heapify(self.heap)
+
+    def most_common(self, limit: int | None = None) -> list[tuple[str, SignatureEntry]]:
+        ranked = sorted(self.entries.items(), key=lambda item: item[1].count, reverse=True)
+        return ranked[:limit] if limit is not None else ranked
+
+    def to_json(self, limit: int | None = None) -> dict:
+        return {
+            "total": self.total,
+            "entries": [
+                [signature, entry.count, entry.error, entry.examples]
+                for signature, entry in self.most_common(limit)
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> SignatureSketch:
+        sketch = cls()
+        for signature, count, error, examples in data.get("entries", []):
+            sketch.entries[signature] = SignatureEntry(count, error, examples)
+        sketch.total = data.get("total", 0)
+        sketch.heap = [(entry.count, signature) for signature, entry in sketch.entries.items()]
+        heapq.heapify(sketch.heap)
+        return sketch
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "worker"))
+
+from check_parser_golden import parser_corpus  # noqa: E402
+from worker.parsers import admin, bank, connect, container, offer  # noqa: E402
+
+CLASSIFIERS = {
+    "bank": bank.LINES,
+    "offer": offer.LINES,
+    "container": container.LINES,
+    "admin": admin.LINES,
+    "connect": connect.LINES,
+}
+
+
+def sequential(classifier, line: str):
+    # The previous matching: every pattern's search() in turn.
+    for rule in classifier.rules:
+        if match := rule.pattern.search(line):
+            return rule.kind, match
+    return None, None
+
+
+def lines_per_sec(classify, classifier, lines: list[str], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for line in lines:
+            classify(classifier, line)
+    return len(lines) * rounds / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parser line matching: sequential search vs literal prefilter")
+    parser.add_argument("--lines", type=int, default=2000, help="lines per block title")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = parser_corpus(args.lines)
+    # Each parser sees every payload line of the corpus: its own shapes,
+    # near misses and other parsers' lines, as after a title mix-up.
+    lines = [line for title_lines in corpus.values() for line in title_lines]
+    print(f"{len(lines)} lines x {args.rounds} rounds")
+    print(f"{'parser':>10}  {'before':>12}  {'after':>12}  speedup")
+    for name, classifier in CLASSIFIERS.items():
+        before = lines_per_sec(sequential, classifier, lines, args.rounds)
+        after = lines_per_sec(type(classifier).classify, classifier, lines, args.rounds)
+        print(f"{name:>10}  {before / 1e6:9.2f}M/s  {after / 1e6:9.2f}M/s  {after / before:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
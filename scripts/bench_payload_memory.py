@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "worker"))
+
+from worker.parsers import EventData, PayloadLine  # noqa: E402
+
+
+# The previous representation: plain dataclasses with a per-instance
+# __dict__ and the block id as a fresh string on every line.
+@dataclass
+class LegacyPayloadLine:
+    text: str
+    raw_block_id: str
+    raw_line_index: int
+    global_line_no: int
+
+
+@dataclass
+class LegacyEventData:
+    event_type: str
+    src_player_id: str | None = None
+    dst_player_id: str | None = None
+    item: str | None = None
+    container: str | None = None
+    money: int | None = None
+    qty: int | None = None
+    metadata: dict | None = None
+    raw_block_id: str | None = None
+    raw_line_index: int | None = None
+    global_line_no: int | None = None
+
+
+def legacy(lines: list[str], block_size: int) -> list:
+    kept = []
+    block_id = uuid.uuid4()
+    for number, text in enumerate(lines):
+        if number % block_size == 0:
+            block_id = uuid.uuid4()
+        payload = LegacyPayloadLine(text, str(block_id), number % block_size, number + 1)
+        event = LegacyEventData(
+            "bank_transfer",
+            money=number,
+            raw_block_id=payload.raw_block_id,
+            raw_line_index=payload.raw_line_index,
+            global_line_no=payload.global_line_no,
+        )
+        kept.append((payload, event, uuid.UUID(event.raw_block_id)))
+    return kept
+
+
+def compact(lines: list[str], block_size: int) -> list:
+    kept = []
+    block_id = uuid.uuid4()
+    for number, text in enumerate(lines):
+        if number % block_size == 0:
+            block_id = uuid.uuid4()
+        payload = PayloadLine(text, block_id, number % block_size, number + 1)
+        event = EventData(
+            "bank_transfer",
+            money=number,
+            raw_block_id=payload.raw_block_id,
+            raw_line_index=payload.raw_line_index,
+            global_line_no=payload.global_line_no,
+        )
+        kept.append((payload, event, event.raw_block_id))
+    return kept
+
+
+def measure(build, lines: list[str], block_size: int) -> tuple[int, float, float]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    kept = build(lines, block_size)
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return peak, current / len(lines), elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory of payload lines and events, legacy vs slotted")
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--block-size", type=int, default=500)
+    args = parser.parse_args()
+
+    lines = [f"Ionel[{number % 999}] a transferat {number}$ lui Maria[7]." for number in range(args.lines)]
+    print(f"{args.lines} lines, one event each, blocks of {args.block_size}")
+    for label, build in (("legacy", legacy), ("slotted", compact)):
+        peak, per_line, elapsed = measure(build, lines, args.block_size)
+        print(
+            f"{label:>8}: peak {peak / (1024 * 1024):7.1f} MiB  "
+            f"{per_line:6.0f} B/line retained  {elapsed:5.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dateutil import parser as date_parser
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "worker"))
+
+from worker.normalizer import TIMEZONE, parse_timestamp  # noqa: E402
+
+
+def synthetic_timestamps(count: int, seed: int = 1) -> list[str]:
+    # Embeds arrive in bursts, so neighbouring timestamps mostly share a
+    # minute; a few are relative ("Today at", "Yesterday at").
+    rng = random.Random(seed)
+    moment = datetime(2026, 2, 1, 8, 0)
+    out = []
+    while len(out) < count:
+        moment += timedelta(seconds=rng.choice([0, 0, 0, 5, 20, 60, 300]))
+        hour = moment.hour % 12 or 12
+        meridiem = "PM" if moment.hour >= 12 else "AM"
+        clock = f"{hour}:{moment.minute:02d} {meridiem}"
+        roll = rng.random()
+        if roll < 0.05:
+            out.append(f"Today at {clock}")
+        elif roll < 0.08:
+            out.append(f"Yesterday at {clock}")
+        else:
+            out.append(f"{moment.month}/{moment.day}/{moment.year} {clock}")
+    return out
+
+
+def dateutil_timestamp(ts_text: str, last_absolute, job_date: datetime):
+    # The previous engine: dateutil for every line.
+    anchor = last_absolute or job_date
+    if ts_text.startswith(("Today at ", "Yesterday at ")):
+        day, _, clock = ts_text.partition(" at ")
+        base = anchor.date() - timedelta(days=1 if day == "Yesterday" else 0)
+        dt = datetime.combine(base, date_parser.parse(clock).time()).replace(tzinfo=TIMEZONE)
+        return dt, "RELATIVE", last_absolute
+    dt = date_parser.parse(ts_text, dayfirst=False).replace(tzinfo=TIMEZONE)
+    return dt, "ABSOLUTE", dt
+
+
+def fast_timestamp(ts_text: str, last_absolute, job_date: datetime):
+    return parse_timestamp(ts_text, last_absolute, job_date, "MDY")
+
+
+def run(engine, stamps: list[str], job_date: datetime) -> tuple[float, list]:
+    results = []
+    last_absolute = None
+    started = time.perf_counter()
+    for ts_text in stamps:
+        occurred_at, quality, last_absolute = engine(ts_text, last_absolute, job_date)
+        results.append((occurred_at, quality))
+    return time.perf_counter() - started, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Timestamp parsing: dateutil vs fast path with cache")
+    parser.add_argument("--lines", type=int, default=500_000)
+    args = parser.parse_args()
+
+    stamps = synthetic_timestamps(args.lines)
+    job_date = datetime(2026, 3, 1, tzinfo=TIMEZONE)
+    print(f"{len(stamps)} timestamps, {len(set(stamps))} distinct")
+    timings = {}
+    outputs = {}
+    for label, engine in (("dateutil", dateutil_timestamp), ("fast", fast_timestamp)):
+        timings[label], outputs[label] = run(engine, stamps, job_date)
+        print(
+            f"{label:>9}: {timings[label]:6.2f}s  "
+            f"{len(stamps) / timings[label] / 1e6:6.2f}M lines/s  "
+            f"{timings[label] / len(stamps) * 1e9:7.0f} ns/line"
+        )
+    if outputs["dateutil"] != outputs["fast"]:
+        raise SystemExit("Engines disagree")
+    print(f"speedup: {timings['dateutil'] / timings['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
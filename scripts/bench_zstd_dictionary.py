@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import zstandard as zstd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "worker"))
+
+from worker.compression import RawDictionary, compress_raw_block, sample_blocks, train_file_dictionary  # noqa: E402
+from worker.config import RAW_DICT_MIN_GAIN  # noqa: E402
+
+NAMES = ["Ionel", "Maria", "Marius", "Andrei", "Elena", "Vlad", "Cristi", "Ana"]
+ITEMS = ["lockpick", "shotgun", "bandage", "phone", "water", "burger", "radio", "rope"]
+
+
+def synthetic_transcript(lines: int, seed: int = 1) -> list[str]:
+    # Same shapes as scripts/sample_transcript.txt, with varying names,
+    # ids, amounts and trunks so blocks are not trivially identical.
+    rng = random.Random(seed)
+    out: list[str] = []
+    while len(out) < lines:
+        name = rng.choice(NAMES)
+        other = rng.choice(NAMES)
+        pid = rng.randint(1, 999)
+        oid = rng.randint(1, 999)
+        minute = rng.randint(0, 59)
+        kind = rng.randrange(5)
+        out.append(f"— 2/{rng.randint(1, 28)}/2026 {rng.randint(1, 12)}:{minute:02d} PM")
+        if kind == 0:
+            out += ["Transfer (Bancar)", f"{name}[{pid}] a transferat {rng.randint(1, 99999)}$ lui {other}[{oid}]."]
+        elif kind == 1:
+            amount = rng.randint(1000, 999999)
+            out += [
+                "💵 Telefon",
+                f"Jucătorului: {name}({pid}) i-au fost luati {amount} $",
+                f"Jucătorului: {other}({oid}) i-au fost adaugati {amount} $",
+            ]
+        elif kind == 2:
+            out += [
+                "⚠️ Obiect aruncat pe jos",
+                f"Jucător: {name} ({pid}) a aruncat pe jos {rng.randint(1, 5)}x {rng.choice(ITEMS)}",
+            ]
+        elif kind == 3:
+            trunk = f"portbagaj_{rng.randint(1, 200)}_{rng.choice(['3xmas', 'bf400', 'sultan'])}_azr{rng.randint(100, 999)}"
+            item = rng.choice(ITEMS)
+            count = rng.randint(1, 10)
+            out += [
+                "Transfera Item",
+                f"[TRANSFER] {name}[{pid}] a pus in {trunk} item-ul {item}(x{count}).",
+                f"[REMOVE] {name}[{pid}] a scos din {trunk} item-ul {item}(x{count}).",
+            ]
+        else:
+            out += ["Server Disconnect", f"{name}[{pid}] s-a deconectat | (r: Exiting)"]
+        out += [f"Made by Synked•Today at {rng.randint(1, 12)}:{minute:02d} AM", ""]
+    return out[:lines]
+
+
+def measure(blocks: list[bytes], level: int, dictionary: RawDictionary | None, rounds: int) -> tuple[int, float]:
+    frames = [compress_raw_block(block, level, dictionary) for block in blocks]
+    decompressor = (
+        zstd.ZstdDecompressor(dict_data=dictionary.data) if dictionary else zstd.ZstdDecompressor()
+    )
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            decompressor.decompress(frame)
+    elapsed = time.perf_counter() - started
+    raw = sum(len(block) for block in blocks) * rounds
+    return sum(len(frame) for frame in frames), raw / elapsed / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Raw block compression with and without a trained zstd dictionary")
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--block-size", type=int, default=500)
+    parser.add_argument("--level", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = synthetic_transcript(args.lines)
+    blocks = [
+        "\n".join(lines[start : start + args.block_size]).encode("utf-8")
+        for start in range(0, len(lines), args.block_size)
+    ]
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt") as handle:
+        handle.write("\n".join(lines))
+        handle.flush()
+        started = time.perf_counter()
+        # min_gain=0 always keeps the dictionary, to measure it either way.
+        trained, gain = train_file_dictionary(
+            sample_blocks(handle.name, args.block_size), args.level, min_gain=0
+        )
+        train_seconds = time.perf_counter() - started
+    if trained is None:
+        raise SystemExit("Dictionary training failed")
+    dictionary = RawDictionary(id=uuid.uuid4(), data=trained)
+
+    raw_bytes = sum(len(block) for block in blocks)
+    print(f"{len(blocks)} blocks of {args.block_size} lines, {raw_bytes / (1024 * 1024):.1f} MiB raw")
+    print(f"dictionary: {len(trained.as_bytes())} bytes, trained in {train_seconds:.2f}s")
+    results = {
+        label: measure(blocks, args.level, used, args.rounds)
+        for label, used in (("plain", None), ("dictionary", dictionary))
+    }
+    # Size and decode speed are reported separately: the dictionary trades
+    # some decode throughput for the smaller blocks.
+    print("ratio")
+    for label, (compressed, _) in results.items():
+        print(f"  {label:>10}: {compressed / (1024 * 1024):7.2f} MiB  {raw_bytes / compressed:5.2f}x")
+    print("decode")
+    for label, (_, throughput) in results.items():
+        print(f"  {label:>10}: {throughput:8.1f} MiB/s")
+    plain_size, plain_speed = results["plain"]
+    dict_size, dict_speed = results["dictionary"]
+    print(
+        f"dictionary: {plain_size / dict_size:.2f}x smaller, decode "
+        f"{(dict_speed - plain_speed) / plain_speed:+.1%}"
+    )
+    decision = "used" if gain >= RAW_DICT_MIN_GAIN else "not used"
+    print(f"held-out gain {gain:.2f}x vs RAW_DICT_MIN_GAIN {RAW_DICT_MIN_GAIN}: dictionary {decision}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE = os.getenv("API_BASE", "http://localhost:8000")
+# Must match the API's leaf hashing (apps/api/app/storage.py).
+HASH_LEAF_SIZE = 1024 * 1024
+RETRIES = 5
+
+_local = threading.local()
+
+
+def http() -> requests.Session:
+    # One pooled session per thread: connections are reused across
+    # chunks without sharing a Session between threads.
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+        session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
+def call(method: str, path: str, retries: int = RETRIES, **kwargs) -> requests.Response:
+    # Retries connection errors and 5xx responses with backoff; other
+    # errors are returned to the caller. Only safe for idempotent calls:
+    # a 5xx does not say whether the request took effect.
+    for attempt in range(retries):
+        try:
+            response = http().request(method, f"{API_BASE}{path}", timeout=300, **kwargs)
+        except requests.ConnectionError:
+            if attempt == retries - 1:
+                raise
+        else:
+            if response.status_code < 500 or attempt == retries - 1:
+                return response
+        time.sleep(min(2**attempt, 30))
+    raise AssertionError("unreachable")
+
+
+def file_digests(path: Path) -> tuple[str, str]:
+    # The API's id (SHA-256 over the 1 MiB leaf digests) and, for files
+    # uploaded before leaf hashing, the plain SHA-256.
+    leaves = hashlib.sha256()
+    plain = hashlib.sha256()
+    with path.open("rb") as handle:
+        while leaf := handle.read(HASH_LEAF_SIZE):
+            leaves.update(hashlib.sha256(leaf).digest())
+            plain.update(leaf)
+    return leaves.hexdigest(), plain.hexdigest()
+
+
+class UploadState:
+    # path -> upload id, so an interrupted run picks up the same upload
+    # sessions and only sends the chunks the API has not recorded.
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: dict[str, dict] = json.loads(path.read_text()) if path.exists() else {}
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key: str, value: dict | None) -> None:
+        with self.lock:
+            if value is None:
+                self.entries.pop(key, None)
+            else:
+                self.entries[key] = value
+            partial = self.path.with_suffix(".tmp")
+            partial.write_text(json.dumps(self.entries, indent=2))
+            partial.replace(self.path)
+
+
+@dataclass
+class Totals:
+    uploaded: int = 0
+    files_done: int = 0
+    files_skipped: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, count: int) -> None:
+        with self.lock:
+            self.uploaded += count
+
+
+def put_chunk(path: Path, upload_id: str, index: int, chunk_size: int, totals: Totals) -> None:
+    with path.open("rb") as handle:
+        data = os.pread(handle.fileno(), chunk_size, index * chunk_size)
+    response = call("PUT", f"/uploads/{upload_id}/chunk", params={"index": index}, data=data)
+    response.raise_for_status()
+    totals.add(len(data))
+
+
+def open_upload(path: Path, size: int, chunk_size: int, state: UploadState) -> dict:
+    key = str(path.resolve())
+    saved = state.get(key)
+    if saved and saved["size"] == size and saved["mtime"] == path.stat().st_mtime:
+        response = call("GET", f"/uploads/{saved['upload_id']}")
+        if response.status_code == 200:
+            return response.json()
+    response = call(
+        "POST",
+        "/uploads/create",
+        json={
+            "filename": path.name,
+            "size": size,
+            "chunk_size": chunk_size,
+            "expected_chunks": math.ceil(size / chunk_size),
+        },
+    )
+    response.raise_for_status()
+    upload = response.json()
+    state.put(key, {"upload_id": upload["id"], "size": size, "mtime": path.stat().st_mtime})
+    return upload
+
+
+def ensure_job(source_file_id: str) -> tuple[dict, bool]:
+    # POST /ingest-jobs is not idempotent, so it is sent once and never
+    # retried blindly: after a failure the job list for the file is checked
+    # again before the next attempt. A file whose only jobs failed gets a
+    # new one.
+    for attempt in range(RETRIES):
+        response = call("GET", "/ingest-jobs", params={"source_file_id": source_file_id})
+        response.raise_for_status()
+        jobs = [job for job in response.json() if job["status"] != "failed"]
+        if jobs:
+            return jobs[0], False
+        try:
+            response = call("POST", "/ingest-jobs", retries=1, json={"source_file_id": source_file_id})
+        except requests.ConnectionError:
+            if attempt == RETRIES - 1:
+                raise
+        else:
+            if response.status_code < 500 or attempt == RETRIES - 1:
+                response.raise_for_status()
+                return response.json(), True
+        time.sleep(min(2**attempt, 30))
+    raise AssertionError("unreachable")
+
+
+def queue_job(path: Path, source_file: dict, uploaded: bool) -> str:
+    done = "uploaded as" if uploaded else "already uploaded as"
+    job, created = ensure_job(source_file["id"])
+    queued = "ingest job" if created else "existing ingest job"
+    return f"{path.name}: {done} {source_file['id']}, {queued} {job['id']}"
+
+
+def ingest_file(
+    path: Path,
+    chunk_size: int,
+    chunks: ThreadPoolExecutor,
+    state: UploadState,
+    totals: Totals,
+    queue_jobs: bool,
+) -> str:
+    for digest in file_digests(path):
+        response = call("GET", f"/uploads/source-files/{digest}")
+        if response.status_code == 200:
+            with totals.lock:
+                totals.files_skipped += 1
+            message = f"{path.name}: already uploaded ({digest[:12]})"
+            if queue_jobs:
+                message = queue_job(path, response.json(), uploaded=False)
+            if state.get(str(path.resolve())):
+                state.put(str(path.resolve()), None)
+            return message
+
+    size = path.stat().st_size
+    upload = open_upload(path, size, chunk_size, state)
+    chunk_size = upload["chunk_size"]
+    received = set(upload["received_chunks"])
+    missing = [index for index in range(upload["expected_chunks"]) if index not in received]
+    if upload["status"] == "OPEN":
+        futures = [
+            chunks.submit(put_chunk, path, upload["id"], index, chunk_size, totals) for index in missing
+        ]
+        for future in as_completed(futures):
+            future.result()
+
+    response = call("POST", f"/uploads/{upload['id']}/finalize")
+    response.raise_for_status()
+    source_file = response.json()
+    with totals.lock:
+        totals.files_done += 1
+    message = f"{path.name}: uploaded as {source_file['id']}"
+    if queue_jobs:
+        message = queue_job(path, source_file, uploaded=True)
+    # Kept until the job exists, so a rerun finds the upload again.
+    state.put(str(path.resolve()), None)
+    return message
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Upload transcripts concurrently and queue their ingest jobs")
+    parser.add_argument("paths", nargs="+", type=Path, help="files or directories of .txt transcripts")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent chunk uploads")
+    parser.add_argument("--files", type=int, default=4, help="files hashed and uploaded at once")
+    parser.add_argument("--chunk-mb", type=int, default=8, help="chunk size in MiB")
+    parser.add_argument("--state", type=Path, default=Path(".bulk_ingest_state.json"))
+    parser.add_argument("--no-ingest", action="store_true", help="upload only, do not queue ingest jobs")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        files.extend(sorted(path.rglob("*.txt")) if path.is_dir() else [path])
+    total_bytes = sum(path.stat().st_size for path in files)
+    print(f"{len(files)} files, {total_bytes / (1024 * 1024):.1f} MiB")
+
+    state = UploadState(args.state)
+    totals = Totals()
+    started = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(args.workers, thread_name_prefix="chunk") as chunks, ThreadPoolExecutor(
+        args.files, thread_name_prefix="file"
+    ) as uploads:
+        futures = {
+            uploads.submit(
+                ingest_file,
+                path,
+                args.chunk_mb * 1024 * 1024,
+                chunks,
+                state,
+                totals,
+                not args.no_ingest,
+            ): path
+            for path in files
+        }
+        for future in as_completed(futures):
+            elapsed = time.perf_counter() - started
+            rate = totals.uploaded / elapsed / (1024 * 1024)
+            try:
+                message = future.result()
+            except Exception as exc:  # noqa: BLE001
+                failed += 1
+                message = f"{futures[future].name}: failed: {exc}"
+            print(f"[{elapsed:7.1f}s {rate:7.1f} MiB/s] {message}")
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Done in {elapsed:.1f}s: {totals.files_done} uploaded, {totals.files_skipped} skipped, "
+        f"{failed} failed, {totals.uploaded / (1024 * 1024):.1f} MiB at "
+        f"{totals.uploaded / elapsed / (1024 * 1024):.1f} MiB/s"
+    )
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
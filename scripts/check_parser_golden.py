@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "worker"))
+
+from worker.parsers import PARSERS, NormalizedBlock, PayloadLine  # noqa: E402
+
+GOLDEN_PATH = Path(__file__).parent / "golden" / "parser_events.jsonl"
+BLOCK_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+NAMES = ["Ionel", "Maria", "Marius", "[Admin] Vlad", "Fondator Ana", "El[ena", "x] a retras 5$"]
+ITEMS = ["lockpick", "shotgun", "bandage", "nil", "apa (mare)", "radio"]
+CONTAINERS = ["portbagaj_84_3xmas_azr350", "torpedo_12", "casa 4"]
+
+
+def _amount(rng: random.Random) -> str:
+    return rng.choice(["5000", "1.250.000", "12,500", "7"])
+
+
+def parser_corpus(lines_per_title: int = 400, seed: int = 7) -> dict[str, list[str]]:
+    # Payload lines per block title: the shapes every parser matches, near
+    # misses, lines belonging to other parsers and plain noise, so a change
+    # in matching shows up as a different event stream.
+    rng = random.Random(seed)
+
+    def name() -> str:
+        return rng.choice(NAMES)
+
+    def pid() -> int:
+        return rng.randint(1, 9999)
+
+    shapes = {
+        "Retragere Banca": lambda: f"{name()}[{pid()}] a retras {_amount(rng)}$",
+        "Depunere Banca": lambda: f"{name()}[{pid()}] a depozitat {_amount(rng)}$",
+        "Transfer (Bancar)": lambda: (
+            f"{name()}[{pid()}] a transferat {_amount(rng)}$ lui {name()}[{pid()}]{rng.choice(['.', ''])}"
+        ),
+        "Ofera Bani": lambda: (
+            f"Jucatorul {name()}[{pid()}] i-a oferit lui {name()}[{pid()}] suma de {_amount(rng)}$."
+        ),
+        "Ofera Item": lambda: (
+            f"Jucatorul {name()}[{pid()}] i-a oferit lui {name()}[{pid()}] - "
+            f"{rng.choice(ITEMS)}(x{rng.randint(1, 50)})."
+        ),
+        "💵 Telefon": lambda: (
+            f"Jucătorului: {name()}({pid()}) i-au fost {rng.choice(['luati', 'adaugati'])} "
+            f"{rng.choice(['1000', '637000', '2500'])} $"
+        ),
+        "⚠️ Obiect aruncat pe jos": lambda: (
+            f"Jucător: {name()} ({pid()}) a aruncat pe jos {rng.randint(1, 9)}x {rng.choice(ITEMS)}"
+        ),
+        "Transfera Item": lambda: rng.choice(
+            [
+                f"[TRANSFER] {name()}[{pid()}] a pus in {rng.choice(CONTAINERS)} item-ul "
+                f"{rng.choice(ITEMS)}(x{rng.randint(1, 9)}).",
+                f"[REMOVE] {name()}[{pid()}] a scos din {rng.choice(CONTAINERS)} item-ul "
+                f"{rng.choice(ITEMS)}(x{rng.randint(1, 9)}).",
+                f"[PERCHEZITIE] Jucatorul {name()}[{pid()}] a scos din {name()} item-ul "
+                f"{rng.choice(ITEMS)}(x{rng.randint(1, 9)}).",
+            ]
+        ),
+        "Server Connect": lambda: (
+            f"{name()}[{pid()}] se conectează cu succes | (ip: 10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)})"
+        ),
+        "Server Disconnect": lambda: (
+            f"{name()}[{pid()}] s-a deconectat | (r: {rng.choice(['Exiting', 'a fost banat', 'timeout'])})"
+        ),
+        "Give Money (K-Menu)": lambda: (
+            f"{name()}[{pid()}] i-a dat lui {name()}[{pid()}] suma de {_amount(rng)}$"
+        ),
+        "Give Item (K-Menu)": lambda: (
+            f"{name()}[{pid()}] i-a dat lui {name()}[{pid()}] item-ul {rng.choice(ITEMS)}(x{rng.randint(1, 9)})"
+        ),
+        "💎 Bijuterii": lambda: (
+            f"Jucător: {name()}({pid()}) a cumparat {rng.choice(ITEMS)} pentru suma de {_amount(rng)}$"
+        ),
+    }
+    generators = list(shapes.values())
+    corpus: dict[str, list[str]] = {}
+    for title, shape in shapes.items():
+        lines = []
+        for _ in range(lines_per_title):
+            roll = rng.random()
+            if roll < 0.7:
+                line = shape()
+            elif roll < 0.8:
+                # Near miss: the right shape, cut short.
+                line = shape()[: rng.randint(1, 40)]
+            elif roll < 0.9:
+                line = rng.choice(generators)()
+            else:
+                line = rng.choice(["", "—", "Made by Synked", "**", "[TRANSFER]", "] a retras "])
+            lines.append(line)
+        corpus[title] = lines
+    return corpus
+
+
+def corpus_blocks(corpus: dict[str, list[str]], block_lines: int = 4) -> list[NormalizedBlock]:
+    blocks = []
+    line_no = 0
+    for title, lines in corpus.items():
+        for start in range(0, len(lines), block_lines):
+            payload = []
+            for text in lines[start : start + block_lines]:
+                line_no += 1
+                payload.append(PayloadLine(text, BLOCK_ID, line_no % 500, line_no))
+            blocks.append(
+                NormalizedBlock(title=title, occurred_at=None, occurred_at_quality="UNKNOWN", payload=payload)
+            )
+    return blocks
+
+
+def event_stream(blocks: list[NormalizedBlock]) -> list[str]:
+    out = []
+    for block in blocks:
+        for parser in PARSERS:
+            if not parser.match(block):
+                continue
+            for event in parser.parse(block):
+                out.append(
+                    json.dumps(
+                        {
+                            "parser": parser.parser_id,
+                            "event_type": event.event_type,
+                            "src_player_id": event.src_player_id,
+                            "dst_player_id": event.dst_player_id,
+                            "item": event.item,
+                            "container": event.container,
+                            "money": event.money,
+                            "qty": event.qty,
+                            "metadata": event.metadata,
+                            "global_line_no": event.global_line_no,
+                        },
+                        ensure_ascii=False,
+                        sort_keys=True,
+                    )
+                )
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare parser output with the recorded golden events")
+    parser.add_argument("--update", action="store_true", help="re-record the golden file")
+    args = parser.parse_args()
+
+    events = event_stream(corpus_blocks(parser_corpus()))
+    if args.update:
+        GOLDEN_PATH.parent.mkdir(exist_ok=True)
+        GOLDEN_PATH.write_text("\n".join(events) + "\n", encoding="utf-8")
+        print(f"Recorded {len(events)} events in {GOLDEN_PATH}")
+        return
+    golden = GOLDEN_PATH.read_text(encoding="utf-8").splitlines()
+    if events != golden:
+        for index, (got, want) in enumerate(zip(events, golden)):
+            if got != want:
+                print(f"First difference at event {index}:\n  got:  {got}\n  want: {want}")
+                break
+        raise SystemExit(f"Parser output differs from golden ({len(events)} vs {len(golden)} events)")
+    print(f"{len(events)} events match {GOLDEN_PATH.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# The API and the worker are built from separate contexts, so code both
+# need is copied into each package and must stay byte-identical.
+SHARED = [
+    ("apps/api/app/event_filters.py", "apps/worker/worker/event_filters.py"),
+]
+
+
+def main() -> None:
+    drifted = []
+    for first, second in SHARED:
+        if (ROOT / first).read_bytes() != (ROOT / second).read_bytes():
+            drifted.append(f"{first} != {second}")
+    if drifted:
+        raise SystemExit("Shared modules differ:\n  " + "\n  ".join(drifted))
+    print(f"{len(SHARED)} shared module(s) identical")
+
+
+if __name__ == "__main__":
+    sys.exit(main())